@@ -1,6 +1,12 @@
+import argparse
+import sys
 import numpy as np
 import pandas as pd
 import traceback
+from submarkets import split_market, solve_submarkets
+from stability import find_blocking_pairs, report
+import instrumentation
+from instrumentation import stage, count
 
 def read_csv_file(filename):
     """Read CSV file and return its content as a string"""
@@ -87,6 +93,24 @@ def deferred_acceptance(candidates_prefs, employers_prefs):
     
     return candidate_matches, proposal_history
 
+def deferred_acceptance_by_submarket(candidates_prefs, employers_prefs, workers=None):
+    """
+    Deferred acceptance run independently on every connected submarket (in a process pool)
+    Returns: matches, history of proposals, both in the original indexing
+    """
+    submarkets = split_market(candidates_prefs, employers_prefs, index_base=0)
+    results = solve_submarkets(deferred_acceptance, submarkets, workers)
+    
+    candidate_matches = [-1] * len(candidates_prefs)
+    proposal_history = []
+    for (candidates, employers, _, _), (local_matches, local_history) in zip(submarkets, results):
+        for local_candidate, local_employer in enumerate(local_matches):
+            if local_employer != -1:
+                candidate_matches[candidates[local_candidate]] = employers[local_employer]
+        proposal_history.extend((candidates[c], employers[e]) for c, e in local_history)
+    
+    return candidate_matches, proposal_history
+
 def write_results(matches, proposal_history, output_file="matching_results.csv"):
     """Write matching results to CSV and print metrics to terminal"""
     # Convert to 1-based indexing for output
@@ -115,6 +139,15 @@ def write_results(matches, proposal_history, output_file="matching_results.csv")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Deferred Acceptance")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes used to solve submarkets in parallel (default: all cores)")
+    parser.add_argument("--verify", action="store_true",
+                        help="check the matching for blocking pairs, exit with status 1 if any is found")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+    
     # File paths
     candidates_file = "candidate_preferences.csv"
     employers_file = "job_preferences.csv"
@@ -122,7 +155,8 @@ def main():
     
     try:
         # Load and process preferences
-        candidates_prefs, employers_prefs = load_preferences(candidates_file, employers_file)
+        with stage('load_preferences'):
+            candidates_prefs, employers_prefs = load_preferences(candidates_file, employers_file)
         
         # Validate input data
         print(f"Number of candidates: {len(candidates_prefs)}")
@@ -132,20 +166,37 @@ def main():
         max_employer_id = max(max(pref) for pref in candidates_prefs)
         print(f"Maximum employer ID in candidates preferences: {max_employer_id}")
         
-        # Run the algorithm
-        matches, history = deferred_acceptance(candidates_prefs, employers_prefs)
+        # Run the algorithm on every independent submarket
+        with stage('deferred_acceptance'):
+            matches, history = deferred_acceptance_by_submarket(candidates_prefs, employers_prefs, args.workers)
+            # Every proposal but the final, accepted ones was rejected (at once or when displaced later)
+            matched = sum(1 for m in matches if m != -1)
+            count('proposals', len(history))
+            count('matches', matched)
+            count('rejections', len(history) - matched)
         
         # Write results
-        write_results(matches, history, output_file)
+        with stage('write_results'):
+            write_results(matches, history, output_file)
         
         print(f"Matching completed successfully. Results written to {output_file}")
         
+        stable = True
+        if args.verify:
+            with stage('verify'):
+                stable = report(find_blocking_pairs(candidates_prefs, employers_prefs, matches))
+        instrumentation.finish(args)
+        if not stable:
+            sys.exit(1)
+        
         return matches, history
         
     except Exception as e:
         print(f"An error occurred: {str(e)}")
         print("Traceback:")
         traceback.print_exc()
+        # A failed run (or a verifier error) must not pass as a success
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,4 +1,17 @@
+import argparse
+import heapq
+import os
+import sys
+from functools import partial
 import pandas as pd
+from submarkets import split_market, iter_solved
+from stability import find_blocking_pairs_per_round, report
+from checkpoint import CHECKPOINT_DIR, fingerprint, save_checkpoint, load_checkpoint, clear_checkpoint
+import instrumentation
+from instrumentation import stage, count
+from match_store import store_rounds
+
+DEFAULT_CHECKPOINT = os.path.join(CHECKPOINT_DIR, "mmdaa")
 
 def read_csv_file(filename):
     """Read CSV file and return its content as a string"""
@@ -29,59 +42,65 @@ def load_preferences(candidates_file, employers_file):
     return candidates_prefs, employers_prefs
 
 def run_daa(candidates_prefs, employers_prefs):
-    """Single round of Deferred Acceptance Algorithm"""
+    """
+    Single round of Deferred Acceptance Algorithm. The lowest numbered free candidate
+    proposes next, kept at the top of a heap instead of rescanning all candidates.
+    """
     n_candidates = len(candidates_prefs)
     matches = {}  # employer -> candidate
     candidate_matches = {}  # candidate -> employer
     
-    # Keep track of proposals
-    proposals = {i: set() for i in range(n_candidates)}
-    
-    while True:
-        # Find an unmatched candidate who hasn't proposed to everyone
-        proposing_candidate = None
-        for c in range(n_candidates):
-            if (c not in candidate_matches and 
-                len(proposals[c]) < len(candidates_prefs[c])):
-                proposing_candidate = c
-                break
+    # Keep track of proposals: employers proposed to, and the position of the next proposal
+    proposals = [set() for _ in range(n_candidates)]
+    next_choice = [0] * n_candidates
+    # Each employer's rank of the candidates it lists (0-based), built when first proposed to
+    employer_ranks = {}
+    
+    def next_employer(c):
+        """Next employer (1-based) candidate c has not proposed to, None if there is none"""
+        prefs = candidates_prefs[c]
+        while next_choice[c] < len(prefs) and prefs[next_choice[c]] in proposals[c]:
+            next_choice[c] += 1
+        return prefs[next_choice[c]] if next_choice[c] < len(prefs) else None
+    
+    # Unmatched candidates who haven't proposed to everyone
+    free = [c for c in range(n_candidates) if next_employer(c) is not None]
+    heapq.heapify(free)
+    
+    while free:
+        proposing_candidate = free[0]
         
-        if proposing_candidate is None:
-            break
-            
         # Get next employer to propose to
-        remaining_prefs = [e for e in candidates_prefs[proposing_candidate] 
-                         if e not in proposals[proposing_candidate]]
-        
-        if not remaining_prefs:
-            continue
-            
-        employer = remaining_prefs[0] - 1  # Convert to 0-based indexing
+        employer = next_employer(proposing_candidate) - 1  # Convert to 0-based indexing
         proposals[proposing_candidate].add(employer + 1)
         
         # If employer has no preferences, reject the proposal
-        if employer >= len(employers_prefs) or not employers_prefs[employer]:
-            continue
+        if employer < len(employers_prefs) and employers_prefs[employer]:
+            if employer not in employer_ranks:
+                # Get employer's preferences (convert to 0-based indexing)
+                ranks = employer_ranks[employer] = {}
+                for rank, c in enumerate(employers_prefs[employer]):
+                    ranks.setdefault(c - 1, rank)
+            ranks = employer_ranks[employer]
             
-        # Get employer's preferences (convert to 0-based indexing)
-        employer_prefs = [c - 1 for c in employers_prefs[employer]]
+            if proposing_candidate in ranks:
+                current_match = matches.get(employer)
+                # If employer is unmatched or prefers new candidate
+                if current_match is None or ranks[proposing_candidate] < ranks[current_match]:
+                    heapq.heappop(free)
+                    if current_match is not None:
+                        # Remove old match
+                        del candidate_matches[current_match]
+                        if next_employer(current_match) is not None:
+                            heapq.heappush(free, current_match)
+                    # Add new match
+                    matches[employer] = proposing_candidate
+                    candidate_matches[proposing_candidate] = employer
+                    continue
         
-        # If employer is unmatched
-        if employer not in matches:
-            if proposing_candidate in employer_prefs:
-                matches[employer] = proposing_candidate
-                candidate_matches[proposing_candidate] = employer
-        else:
-            current_match = matches[employer]
-            # If employer prefers new candidate
-            if (proposing_candidate in employer_prefs and 
-                (current_match not in employer_prefs or 
-                 employer_prefs.index(proposing_candidate) < employer_prefs.index(current_match))):
-                # Remove old match
-                del candidate_matches[current_match]
-                # Add new match
-                matches[employer] = proposing_candidate
-                candidate_matches[proposing_candidate] = employer
+        # Rejected, the candidate stays first in line unless its list is exhausted
+        if next_employer(proposing_candidate) is None:
+            heapq.heappop(free)
     
     # Convert back to 1-based indexing
     return [(c + 1, e + 1) for e, c in matches.items()]
@@ -89,13 +108,34 @@ def run_daa(candidates_prefs, employers_prefs):
 def multi_match_daa(candidates_prefs, employers_prefs, k):
     """Multi-Match Deferred Acceptance Algorithm"""
     all_matches = []
-    match_number = 0
+    for matches, proposals in match_rounds(candidates_prefs, employers_prefs, k):
+        all_matches.append(matches)
+        count_proposals(proposals, len(matches))
+    count('rounds', len(all_matches))
+    return all_matches
+
+def match_rounds(candidates_prefs, employers_prefs, k, state=None, on_round=None):
+    """
+    Rounds of the Multi-Match Deferred Acceptance Algorithm, without instrumentation so it
+    can run in a worker process.
+    
+    Parameters:
+    state: {'rounds', 'candidates_prefs', 'employers_prefs'} after some finished rounds (as
+           passed to on_round), matching continues from there
+    on_round: called with the state after every finished round, e.g. to checkpoint it
     
-    # Make copies of original preferences
-    current_candidates_prefs = [prefs.copy() for prefs in candidates_prefs]
-    current_employers_prefs = [prefs.copy() for prefs in employers_prefs]
+    Returns: list of (matches, proposals) per round
+    """
+    if state is None:
+        # Make copies of original preferences
+        state = {'rounds': [],
+                 'candidates_prefs': [prefs.copy() for prefs in candidates_prefs],
+                 'employers_prefs': [prefs.copy() for prefs in employers_prefs]}
+    rounds = state['rounds']
+    current_candidates_prefs = state['candidates_prefs']
+    current_employers_prefs = state['employers_prefs']
     
-    while match_number < k:
+    while len(rounds) < k:
         # Run DAA with current preferences
         matches = run_daa(current_candidates_prefs, current_employers_prefs)
         
@@ -103,21 +143,99 @@ def multi_match_daa(candidates_prefs, employers_prefs, k):
             break
             
         # Add matches to results
-        all_matches.append(matches)
-        match_number += 1
+        rounds.append((matches, round_proposals(current_candidates_prefs, matches)))
         
         # Remove matched pairs from preference lists
-        for candidate, employer in matches:
-            # Remove employer from candidate's preferences (1-based indexing)
-            if candidate <= len(current_candidates_prefs):
-                if employer in current_candidates_prefs[candidate-1]:
-                    current_candidates_prefs[candidate-1].remove(employer)
-            
-            # Remove candidate from employer's preferences (1-based indexing)
-            if employer <= len(current_employers_prefs):
-                if candidate in current_employers_prefs[employer-1]:
-                    current_employers_prefs[employer-1].remove(candidate)
+        remove_matched_pairs(current_candidates_prefs, current_employers_prefs, matches)
+        if on_round is not None:
+            on_round(state)
     
+    return rounds
+
+def checkpointed_rounds(candidates_prefs, employers_prefs, k, checkpoint_dir):
+    """
+    match_rounds that saves its state after every finished round, and continues from the
+    rounds saved by an earlier run. Every submarket has its own file in checkpoint_dir, named
+    after a fingerprint of its input, so this also works in a worker process.
+    """
+    input_fingerprint = fingerprint(candidates_prefs, employers_prefs, k)
+    checkpoint_file = os.path.join(checkpoint_dir, f"submarket_{input_fingerprint[:16]}.pkl")
+    state = load_checkpoint(checkpoint_file, input_fingerprint)
+    return match_rounds(candidates_prefs, employers_prefs, k, state,
+                        partial(_save_rounds, checkpoint_file, input_fingerprint))
+
+def _save_rounds(checkpoint_file, input_fingerprint, state):
+    save_checkpoint(checkpoint_file, {'fingerprint': input_fingerprint, **state})
+
+def round_proposals(candidates_prefs, matches):
+    """
+    Proposals made in a finished round. A candidate proposes down its list until it holds
+    an employer, so its proposals are the prefix up to its match.
+    """
+    matched = {candidate: employer for candidate, employer in matches}
+    proposals = 0
+    for candidate, prefs in enumerate(candidates_prefs, 1):
+        employer = matched.get(candidate)
+        proposals += prefs.index(employer) + 1 if employer is not None else len(prefs)
+    return proposals
+
+def count_proposals(proposals, n_matches):
+    """Add the proposals and matches of a finished round (of one submarket) to the instrumentation counters"""
+    count('proposals', proposals)
+    count('matches', n_matches)
+    count('rejections', proposals - n_matches)
+
+def remove_matched_pairs(candidates_prefs, employers_prefs, matches):
+    """Remove the pairs matched in a round from both sides' preference lists (in place)"""
+    for candidate, employer in matches:
+        # Remove employer from candidate's preferences (1-based indexing)
+        if candidate <= len(candidates_prefs):
+            if employer in candidates_prefs[candidate-1]:
+                candidates_prefs[candidate-1].remove(employer)
+        
+        # Remove candidate from employer's preferences (1-based indexing)
+        if employer <= len(employers_prefs):
+            if candidate in employers_prefs[employer-1]:
+                employers_prefs[employer-1].remove(candidate)
+
+def multi_match_daa_by_submarket(candidates_prefs, employers_prefs, k, workers=None,
+                                 checkpoint_dir=None, resume=False):
+    """
+    Multi-Match Deferred Acceptance run independently on every connected submarket
+    (in one process pool), with round r of every submarket merged into round r of the result.
+    
+    With checkpoint_dir, every finished round of every submarket is saved there with the
+    residual preference lists (see checkpointed_rounds); resume=True continues from the saved
+    rounds, otherwise earlier checkpoints are discarded.
+    """
+    submarkets = split_market(candidates_prefs, employers_prefs, index_base=1)
+    
+    if checkpoint_dir is None:
+        solve = partial(match_rounds, k=k)
+    else:
+        if resume and os.path.isdir(checkpoint_dir):
+            print(f"Resuming from the rounds saved in {checkpoint_dir}")
+        elif not resume:
+            clear_checkpoint(checkpoint_dir)
+        solve = partial(checkpointed_rounds, k=k, checkpoint_dir=checkpoint_dir)
+    
+    solved = {}
+    for batch in iter_solved(solve, submarkets, workers):
+        for i, rounds in batch:
+            solved[i] = rounds
+            for matches, proposals in rounds:
+                count_proposals(proposals, len(matches))
+    
+    all_matches = []
+    for i, (candidates, employers, _, _) in enumerate(submarkets):
+        for round_idx, (matches, _) in enumerate(solved[i]):
+            if round_idx == len(all_matches):
+                all_matches.append([])
+            # Map submarket IDs back to the original (1-based) IDs
+            all_matches[round_idx].extend((candidates[c - 1] + 1, employers[e - 1] + 1) for c, e in matches)
+    
+    # Round r of every submarket is one round of the result
+    count('rounds', len(all_matches))
     return all_matches
 
 def write_results(all_matches, n_candidates, n_employers, candidate_file, job_file):
@@ -145,6 +263,23 @@ def write_results(all_matches, n_candidates, n_employers, candidate_file, job_fi
             f.write(','.join(map(str, matches)) + '\n')
 
 def main():
+    parser = argparse.ArgumentParser(description="Multi-Match Deferred Acceptance")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes used to solve submarkets in parallel (default: all cores)")
+    parser.add_argument("--checkpoint", nargs="?", const=DEFAULT_CHECKPOINT, metavar="DIR",
+                        help=f"save every finished round to DIR (default {DEFAULT_CHECKPOINT}) while matching")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue from the rounds saved in the checkpoint (implies --checkpoint)")
+    parser.add_argument("--store", metavar="FILE",
+                        help="also save the rounds to this match store (see match_store.py), e.g. match_store.db")
+    parser.add_argument("--verify", action="store_true",
+                        help="check every round for blocking pairs, exit with status 1 if any is found")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        args.checkpoint = DEFAULT_CHECKPOINT
+    instrumentation.setup(args)
+    
     try:
         # File paths
         candidates_file = "candidate_preferences.csv"
@@ -153,31 +288,51 @@ def main():
         job_output_file = "job_pairs.csv"
         
         # Load preferences
-        candidates_prefs, employers_prefs = load_preferences(candidates_file, employers_file)
+        with stage('load_preferences'):
+            candidates_prefs, employers_prefs = load_preferences(candidates_file, employers_file)
         
         print(f"Loaded {len(candidates_prefs)} candidates and {len(employers_prefs)} employers")
         
         # Set maximum number of matches to find
         k = 10
         
-        # Run MMDAA
-        all_matches = multi_match_daa(candidates_prefs, employers_prefs, k)
+        # Run MMDAA on every independent submarket
+        with stage('multi_match_daa'):
+            all_matches = multi_match_daa_by_submarket(candidates_prefs, employers_prefs, k, args.workers,
+                                                       args.checkpoint, args.resume)
         
         # Write results
-        write_results(all_matches, 
-                     len(candidates_prefs), 
-                     len(employers_prefs),
-                     candidate_output_file, 
-                     job_output_file)
+        with stage('write_results'):
+            write_results(all_matches, 
+                         len(candidates_prefs), 
+                         len(employers_prefs),
+                         candidate_output_file, 
+                         job_output_file)
+        if args.checkpoint:
+            clear_checkpoint(args.checkpoint)
+        if args.store:
+            with stage('store_rounds'):
+                store_rounds(args.store, all_matches)
         
         print(f"Matching completed successfully.")
         print(f"Found {len(all_matches)} stable matchings.")
         print(f"Results written to {candidate_output_file} and {job_output_file}")
         
+        stable = [True]
+        if args.verify:
+            with stage('verify'):
+                rounds = find_blocking_pairs_per_round(candidates_prefs, employers_prefs, all_matches)
+                stable = [report(pairs, f"Round {round_idx}") for round_idx, pairs in enumerate(rounds, 1)]
+        instrumentation.finish(args)
+        if not all(stable):
+            sys.exit(1)
+        
     except Exception as e:
         print(f"An error occurred: {str(e)}")
         import traceback
         traceback.print_exc()
+        # A failed run (or a verifier error) must not pass as a success
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
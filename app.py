@@ -1,13 +1,38 @@
 import os
-from flask import Flask, request, render_template
+import sqlite3
+import time
+from flask import Flask, Response, g, jsonify, request, render_template
 import json
+import match_store
+import metrics
 from resumeparser import ats_extractor, _read_file_from_path
 
 UPLOAD_PATH = r"__DATA__"
+MATCH_STORE = match_store.STORE_FILE
 
 app = Flask(__name__)
 
 
+@app.before_request
+def _start_request():
+    g.request_start = time.perf_counter()
+    metrics.IN_FLIGHT.inc(request.endpoint or "unknown")
+
+
+@app.after_request
+def _finish_request(response):
+    endpoint = request.endpoint or "unknown"
+    metrics.REQUEST_LATENCY.observe(time.perf_counter() - g.request_start, endpoint)
+    metrics.REQUESTS.inc(endpoint, response.status_code)
+    return response
+
+
+@app.teardown_request
+def _end_request(exc):
+    # Runs even when the request failed, so the gauge never drifts upwards
+    metrics.IN_FLIGHT.dec(request.endpoint or "unknown")
+
+
 @app.route("/")
 def index():
     return render_template("index.html")
@@ -21,19 +46,84 @@ def ats():
     Returns:
         Rendered HTML page with extracted data.
     """
-    # Ensure the upload path exists
-    os.makedirs(UPLOAD_PATH, exist_ok=True)
+    with metrics.phase("upload_save"):
+        # Ensure the upload path exists
+        os.makedirs(UPLOAD_PATH, exist_ok=True)
+
+        doc = request.files["pdf_doc"]
+        doc.save(os.path.join(UPLOAD_PATH, "file.pdf"))
+        doc_path = os.path.join(UPLOAD_PATH, "file.pdf")
 
-    doc = request.files["pdf_doc"]
-    doc.save(os.path.join(UPLOAD_PATH, "file.pdf"))
-    doc_path = os.path.join(UPLOAD_PATH, "file.pdf")
+    # Times its llm_upload and generation phases itself
     extracted_data = ats_extractor(doc_path)
 
-    # return render_template("index.html", data=extracted_data)
-    ## save the extracted data to a json file and show it prettily in the editor
-    with open("extracted_data.json", "w") as f:
-        json.dump(extracted_data, f)
-    return render_template("index.html", data=extracted_data)
+    with metrics.phase("render"):
+        # return render_template("index.html", data=extracted_data)
+        ## save the extracted data to a json file and show it prettily in the editor
+        with open("extracted_data.json", "w") as f:
+            json.dump(extracted_data, f)
+        return render_template("index.html", data=extracted_data)
+
+
+@app.route("/matches/candidate/<int:candidate_id>")
+def candidate_matches(candidate_id):
+    """
+    Best scored jobs of a candidate and the jobs it was matched to per round.
+
+    Query parameters:
+        n: Number of top jobs (default 10, negative values are rejected).
+        round: Only the match of this round.
+
+    Returns:
+        JSON with "top" and "matched" lists.
+    """
+    try:
+        return jsonify(
+            candidate_id=candidate_id,
+            top=match_store.top_matches(MATCH_STORE, candidate_id, request.args.get("n", 10, type=int)),
+            matched=match_store.matched_jobs(MATCH_STORE, candidate_id, request.args.get("round", type=int)),
+        )
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    except (FileNotFoundError, sqlite3.OperationalError) as e:
+        # No store yet, or one written before both tables were created together
+        return jsonify(error=str(e)), 503
+
+
+@app.route("/matches/job/<int:job_id>")
+def job_matches(job_id):
+    """
+    Best scored candidates of a job and the candidates matched to it per round.
+
+    Query parameters:
+        n: Number of top candidates (default 10, negative values are rejected).
+        round: Only the matches of this round.
+
+    Returns:
+        JSON with "top" and "matched" lists.
+    """
+    try:
+        return jsonify(
+            job_id=job_id,
+            top=match_store.top_candidates(MATCH_STORE, job_id, request.args.get("n", 10, type=int)),
+            matched=match_store.matched_candidates(MATCH_STORE, job_id, request.args.get("round", type=int)),
+        )
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    except (FileNotFoundError, sqlite3.OperationalError) as e:
+        # No store yet, or one written before both tables were created together
+        return jsonify(error=str(e)), 503
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """
+    Exposes the request, phase latency and error metrics.
+
+    Returns:
+        Prometheus text exposition format.
+    """
+    return Response(metrics.render_all(), mimetype="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,270 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+from combined_dataset import BLOCK_SIZE, match_block
+from data_generator import generate_candidates, generate_jobs
+from DAA import deferred_acceptance
+from MMDAA import multi_match_daa_by_submarket
+from displacement import calculate_displacement
+from score_matrix import top_n_preferences, positions_to_ids
+from scorer import FEATURES, WeightedSumScorer
+from skill_matrix import SkillMatcher
+from storage import load_matches, write_matches
+
+BASELINE_FILE = 'benchmark_baselines.json'
+SEED = 42
+
+# Candidates x jobs of every market size
+SIZES = {'1k': (900, 100), '10k': (9500, 500), '100k': (99000, 1000)}
+DEFAULT_SIZES = ['1k', '10k']
+STAGES = ['generate', 'match_table', 'match_table_pairwise', 'storage_csv', 'storage_parquet', 'skill_matrix', 'scoring',
+          'preferences', 'daa', 'mmdaa', 'displacement']
+
+TOP_N = 10
+K = 10
+# Pairs run through the per-pair loop of combined_dataset.match_block (the default
+# --skill-scorer pairwise), a fixed slice since the whole market would take hours
+PAIRWISE_PAIRS = 5000
+# Pairs of the match table written and read back through storage.py in each file format,
+# also a fixed slice so the CSV round trip stays affordable at every size
+STORAGE_PAIRS = 200_000
+STORAGE_FORMATS = {'storage_csv': '.csv', 'storage_parquet': '.parquet'}
+# Synthetic features are generated and scored in row blocks of about this many cells
+BLOCK_CELLS = 1 << 24
+
+# A stage regresses if it is this much slower than its baseline...
+REGRESSION_THRESHOLD = 0.20
+# ...and slower by more than this many seconds (timer noise on the fast stages)
+MIN_REGRESSION_SECONDS = 0.05
+
+
+def timed(fn, repeats):
+    """
+    Best wall time of repeats calls of fn, and the result of the last call.
+    Like timeit, the garbage collector is off while timing so its pauses do not add noise.
+    """
+    best = float('inf')
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return best, result
+
+
+def score_market(n_candidates, n_jobs, seed, repeats):
+    """
+    Score a synthetic market with the weighted-sum scorer. The 0-100 features are drawn per
+    row block (not timed), so the 100k market never holds all of them at once.
+
+    Returns: seconds spent scoring, candidate x job score matrix
+    """
+    scorer = WeightedSumScorer()
+    scores = np.empty((n_candidates, n_jobs), dtype=np.float32)
+    rows = max(1, BLOCK_CELLS // n_jobs)
+    seconds = 0.0
+
+    for block_idx, start in enumerate(range(0, n_candidates, rows)):
+        rng = np.random.default_rng([seed, block_idx])
+        shape = (min(rows, n_candidates - start), n_jobs)
+        features = {name: rng.integers(0, 101, size=shape, dtype=np.uint8).astype(np.float32) for name in FEATURES}
+        block_seconds, scores[start:start + shape[0]] = timed(lambda: scorer.score(features), repeats)
+        seconds += block_seconds
+
+    return seconds, scores
+
+
+def run_market(size, repeats):
+    """
+    Time every stage of the pipeline on one fixed-seed market. Each stage feeds the next:
+    scores -> preference lists -> DAA matching -> displacement.
+
+    Returns: {stage: {'seconds', 'items', 'items_per_sec'}}
+    """
+    n_candidates, n_jobs = SIZES[size]
+    n_agents = n_candidates + n_jobs
+    seed = SEED + n_agents
+    results = {}
+
+    def record(stage, seconds, items, **extra):
+        results[stage] = {'seconds': seconds, 'items': items, 'items_per_sec': items / seconds if seconds else None,
+                          **extra}
+        print(f"  {stage:<20} {seconds:10.4f}s  {items:>12,} items"
+              + ''.join(f"  {value:>12,} {name}" for name, value in extra.items()))
+
+    seconds, (candidates, jobs) = timed(lambda: (generate_candidates(n_candidates, seed=seed),
+                                                 generate_jobs(n_jobs, seed=seed + 1)), repeats)
+    record('generate', seconds, n_agents)
+
+    # The whole match table, block by block like combined_dataset.py --skill-scorer sparse
+    # (the blocks are dropped, so the 100k market does not hold all pairs at once)
+    def build_match_table():
+        skill_matcher = SkillMatcher(jobs['Required Skills'])
+        for start in range(0, n_candidates, BLOCK_SIZE):
+            match_block(candidates.iloc[start:start + BLOCK_SIZE], jobs, skill_matcher)
+
+    seconds, _ = timed(build_match_table, repeats)
+    record('match_table', seconds, n_candidates * n_jobs)
+
+    # Only a slice of PAIRWISE_PAIRS pairs, the same block of candidates at every size
+    block = candidates.iloc[:max(1, PAIRWISE_PAIRS // n_jobs)]
+    seconds, _ = timed(lambda: match_block(block, jobs), repeats)
+    record('match_table_pairwise', seconds, len(block) * n_jobs)
+
+    # Write and read back a typed match table slice (storage.write_matches/load_matches),
+    # as CSV and as Parquet; the file size is recorded next to the round trip time
+    table = match_block(candidates.iloc[:max(1, STORAGE_PAIRS // n_jobs)], jobs, SkillMatcher(jobs['Required Skills']))
+    def round_trip(path):
+        write_matches(table, path)
+        return load_matches(path)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for stage, extension in STORAGE_FORMATS.items():
+            path = os.path.join(tmp, 'all_matches' + extension)
+            seconds, _ = timed(lambda: round_trip(path), repeats)
+            record(stage, seconds, len(table), bytes=os.path.getsize(path))
+    del table
+
+    # Skill_Match of the whole market as sparse products (skill_matrix.py)
+    seconds, _ = timed(lambda: SkillMatcher(jobs['Required Skills']).score(candidates['Skills']), repeats)
+    record('skill_matrix', seconds, n_candidates * n_jobs)
+
+    seconds, scores = score_market(n_candidates, n_jobs, seed, repeats)
+    record('scoring', seconds, n_candidates * n_jobs)
+
+    # Preference lists as preference_generator.py writes them (1-based IDs, 0 padded)
+    seconds, (candidate_rows, job_rows) = timed(lambda: (
+        positions_to_ids(top_n_preferences(scores, TOP_N, axis=1), np.arange(1, n_jobs + 1)),
+        positions_to_ids(top_n_preferences(scores, TOP_N, axis=0), np.arange(1, n_candidates + 1))), repeats)
+    record('preferences', seconds, n_candidates * n_jobs)
+    del scores
+
+    candidates_prefs = [[x for x in row if x > 0] for row in candidate_rows.tolist()]
+    employers_prefs = [[x for x in row if x > 0] for row in job_rows.tolist()]
+
+    # DAA.py works on 0-based IDs
+    seconds, (matches, history) = timed(lambda: deferred_acceptance(
+        [[e - 1 for e in prefs] for prefs in candidates_prefs],
+        [[c - 1 for c in prefs] for prefs in employers_prefs]), repeats)
+    record('daa', seconds, len(history))
+
+    # The production path of MMDAA.py, every submarket in the process pool
+    seconds, all_matches = timed(lambda: multi_match_daa_by_submarket(candidates_prefs, employers_prefs, K), repeats)
+    record('mmdaa', seconds, sum(len(round_matches) for round_matches in all_matches))
+
+    # Displacement of both sides in the DAA matching
+    pairs = [(c + 1, e + 1) for c, e in enumerate(matches) if e != -1]
+    seconds, _ = timed(lambda: (calculate_displacement(candidates_prefs, pairs),
+                                calculate_displacement(employers_prefs, [(e, c) for c, e in pairs])), repeats)
+    record('displacement', seconds, n_agents)
+
+    return results
+
+
+def compare(results, baselines, threshold=REGRESSION_THRESHOLD):
+    """
+    Compare stage timings with the baselines.
+
+    Returns: list of (size, stage, baseline seconds, seconds, status), status is 'ok',
+             'regression', 'faster', 'new' or 'skipped'
+    """
+    rows = []
+    for size, stages in results.items():
+        for stage in STAGES:
+            current = stages.get(stage, {})
+            base = baselines.get(size, {}).get(stage, {})
+            if 'seconds' not in current:
+                rows.append((size, stage, base.get('seconds'), None, 'skipped'))
+            elif 'seconds' not in base:
+                rows.append((size, stage, None, current['seconds'], 'new'))
+            else:
+                slower = current['seconds'] - base['seconds']
+                if current['seconds'] > base['seconds'] * (1 + threshold) and slower > MIN_REGRESSION_SECONDS:
+                    status = 'regression'
+                elif current['seconds'] < base['seconds'] * (1 - threshold) and -slower > MIN_REGRESSION_SECONDS:
+                    status = 'faster'
+                else:
+                    status = 'ok'
+                rows.append((size, stage, base['seconds'], current['seconds'], status))
+    return rows
+
+
+def print_comparison(rows):
+    def fmt(seconds):
+        return f"{seconds:.4f}" if seconds is not None else "-"
+
+    print(f"\n{'size':<6} {'stage':<20} {'baseline':>10} {'current':>10} {'change':>8}  status")
+    for size, stage, base, current, status in rows:
+        change = f"{(current / base - 1) * 100:+.1f}%" if base and current is not None else "-"
+        print(f"{size:<6} {stage:<20} {fmt(base):>10} {fmt(current):>10} {change:>8}  {status}")
+
+
+def machine_info():
+    return {'python': platform.python_version(), 'numpy': np.__version__,
+            'machine': platform.machine(), 'processor': platform.processor(), 'system': platform.system()}
+
+
+def load_baselines(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'machine': None, 'results': {}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every stage of the matching pipeline on synthetic markets "
+                                                 "and compare with the stored baselines")
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=DEFAULT_SIZES)
+    parser.add_argument('--repeats', type=int, default=5, help="runs per stage, the best time counts")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="relative slowdown reported as a regression")
+    parser.add_argument('--baselines', default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="store this run's timings as the baselines of the sizes that were run")
+    parser.add_argument('--output', help="also write this run's timings as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        print(f"Market {size}: {SIZES[size][0]} candidates x {SIZES[size][1]} jobs")
+        results[size] = run_market(size, args.repeats)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'machine': machine_info(), 'results': results}, f, indent=2)
+
+    baselines = load_baselines(args.baselines)
+    if args.save_baseline:
+        baselines['machine'] = machine_info()
+        baselines['results'].update(results)
+        with open(args.baselines, 'w') as f:
+            json.dump(baselines, f, indent=2)
+        print(f"\nBaselines of {', '.join(args.sizes)} saved to {args.baselines}")
+        return
+
+    if baselines['machine'] and baselines['machine'] != machine_info():
+        print(f"\nNote: the baselines were recorded on a different setup ({baselines['machine']}), "
+              f"re-record them with --save-baseline for meaningful comparisons")
+
+    rows = compare(results, baselines['results'], args.threshold)
+    print_comparison(rows)
+    regressions = [row for row in rows if row[4] == 'regression']
+    if regressions:
+        print(f"\n{len(regressions)} stages regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import hashlib
+import os
+import pickle
+import shutil
+
+# Default location of the checkpoints of every stage
+CHECKPOINT_DIR = 'checkpoints'
+
+
+def fingerprint(*objects):
+    """Short digest of a stage's input, stored with its checkpoint to detect a changed input"""
+    return hashlib.sha256(pickle.dumps(objects, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+
+
+def save_checkpoint(path, state):
+    """Pickle state to path atomically, a crash mid-write leaves the previous checkpoint intact"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    # Per process, worker processes may save the same checkpoint at the same time
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path, fingerprint=None):
+    """
+    Load a checkpoint written by save_checkpoint.
+    Returns None if there is none, or if it was written for a different input (fingerprint).
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        state = pickle.load(f)
+    if fingerprint is not None and state.get('fingerprint') != fingerprint:
+        print(f"Ignoring checkpoint {path}: it was written for a different input")
+        return None
+    return state
+
+
+def clear_checkpoint(path):
+    """Remove a checkpoint file or directory once its stage has finished"""
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
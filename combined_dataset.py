@@ -1,16 +1,44 @@
+import argparse
+import os
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
+from storage import load_candidates, load_jobs, write_matches, normalize_matches
+from scorer import DEFAULT_WEIGHTS
+from skill_matrix import SkillMatcher
+from checkpoint import CHECKPOINT_DIR, save_checkpoint, load_checkpoint, clear_checkpoint
+import instrumentation
+from instrumentation import stage, count
 
-# Load the data
-candidate_df = pd.read_csv('candidate_mock_data.csv')
-job_df = pd.read_csv('job_mock_data.csv')
+# Input files (typed .parquet from storage.py is preferred, raw .csv still works)
+CANDIDATE_FILE = 'candidate_mock_data.parquet'
+JOB_FILE = 'job_mock_data.parquet'
+OUTPUT_FILE = 'all_matches.parquet'
 
-def clean_salary(salary):
-    """Clean salary values by removing commas and converting to float"""
-    if isinstance(salary, str):
-        return float(salary.replace(',', ''))
-    return float(salary)
+# Degree levels, a candidate matches a job that requires at most its own level
+DEGREE_HIERARCHY = {
+    'High School': 1,
+    'Bachelor\'s': 2,
+    'Master\'s': 3,
+    'PhD': 4
+}
+
+# Candidates processed (and checkpointed) together
+BLOCK_SIZE = 1000
+# Checkpoint directory of --checkpoint/--resume
+DEFAULT_CHECKPOINT = os.path.join(CHECKPOINT_DIR, 'combined_dataset')
+
+# Columns this stage needs from each dataset
+CANDIDATE_COLUMNS = ['CandidateID', 'Skills', 'Experience (Years)', 'Location', 'Degree',
+                     'Expected Salary', 'Remote']
+JOB_COLUMNS = ['JobID', 'Required Skills', 'Min Experience (Years)', 'Location',
+               'Degree Requirement', 'Salary Offered (In INR)', 'Remote Allowed']
+
+def load_datasets():
+    """Load candidates and jobs, falling back to the raw CSVs if no Parquet exists"""
+    candidate_file = CANDIDATE_FILE if os.path.exists(CANDIDATE_FILE) else 'candidate_mock_data.csv'
+    job_file = JOB_FILE if os.path.exists(JOB_FILE) else 'job_mock_data.csv'
+    return load_candidates(candidate_file, CANDIDATE_COLUMNS), load_jobs(job_file, JOB_COLUMNS)
 
 def calculate_skill_match(candidate_skills, job_skills):
     """Calculate the percentage of job skills that match with candidate skills"""
@@ -20,27 +48,34 @@ def calculate_skill_match(candidate_skills, job_skills):
     matches = sum(1 for skill in job_skills_list if any(s in skill or skill in s for s in candidate_skills_list))
     return (matches / len(job_skills_list)) * 100 if job_skills_list else 0
 
+def degree_levels(degrees):
+    """Hierarchy level of every degree, as calculate_degree_match ranks them (0 if unknown)"""
+    return pd.Series(degrees, dtype=object).map(DEGREE_HIERARCHY).fillna(0).to_numpy()
+
 def calculate_degree_match(candidate_degree, required_degree):
     """Calculate degree match based on hierarchy"""
-    degree_hierarchy = {
-        'High School': 1,
-        'Bachelor\'s': 2,
-        'Master\'s': 3,
-        'PhD': 4
-    }
-    
-    candidate_level = degree_hierarchy.get(candidate_degree, 0)
-    required_level = degree_hierarchy.get(required_degree, 0)
+    candidate_level = DEGREE_HIERARCHY.get(candidate_degree, 0)
+    required_level = DEGREE_HIERARCHY.get(required_degree, 0)
     
     # If candidate has higher or equal degree level, it's a match
     return 100 if candidate_level >= required_level else 0
 
-def prepare_matching_data():
-    """Prepare cross-product of candidates and jobs with feature engineering"""
-    # Clean salary columns
-    candidate_df['Expected_Salary_Clean'] = candidate_df['Expected Salary'].apply(clean_salary)
-    job_df['Salary_Offered_Clean'] = job_df['Salary Offered (In INR)'].apply(clean_salary)
+@stage('match_block')
+def match_block(candidate_df, job_df, skill_matcher=None):
+    """
+    Features and match score for every pair of a block of candidates with all jobs
+    
+    Parameters:
+    skill_matcher: optional skill_matrix.SkillMatcher for job_df, computes all Skill_Match
+                   values of the block in one sparse product and the other features as
+                   candidate x job arrays instead of pair by pair (same values)
+    """
+    if skill_matcher is not None:
+        matches_df = match_block_arrays(candidate_df, job_df, skill_matcher)
+        count('pairs_scored', len(matches_df))
+        return normalize_matches(matches_df)
     
+    # Salaries are already numeric, they are parsed once when the data is loaded
     # Create cross product
     matches = []
     
@@ -54,22 +89,22 @@ def prepare_matching_data():
             
             degree_match = calculate_degree_match(candidate['Degree'], job['Degree Requirement'])
             
-            salary_match = 100 if candidate['Expected_Salary_Clean'] <= job['Salary_Offered_Clean'] else \
-                          (job['Salary_Offered_Clean'] / candidate['Expected_Salary_Clean'] * 100)
+            salary_match = 100 if candidate['Expected Salary'] <= job['Salary Offered (In INR)'] else \
+                          (job['Salary Offered (In INR)'] / candidate['Expected Salary'] * 100)
             
             location_match = 100 if candidate['Location'] == job['Location'] else 0
             
             remote_match = 100 if (job['Remote Allowed'] == 'Yes' and candidate['Remote'] == 'Yes') or \
                                  (job['Remote Allowed'] == 'No' and candidate['Remote'] == 'No') else 0
             
-            # Calculate weighted match score
+            # Calculate weighted match score (weights are defined in scorer.py)
             weighted_match = (
-                skill_match * 0.70 +      # 70% weight for skills
-                experience_match * 0.05 +  # 5% weight for experience
-                degree_match * 0.10 +      # 10% weight for degree
-                salary_match * 0.10 +      # 10% weight for salary
-                remote_match * 0.025 +     # 2.5% weight for remote preference
-                location_match * 0.025     # 2.5% weight for location
+                skill_match * DEFAULT_WEIGHTS['Skill_Match'] +
+                experience_match * DEFAULT_WEIGHTS['Experience_Match'] +
+                degree_match * DEFAULT_WEIGHTS['Degree_Match'] +
+                salary_match * DEFAULT_WEIGHTS['Salary_Match'] +
+                remote_match * DEFAULT_WEIGHTS['Remote_Match'] +
+                location_match * DEFAULT_WEIGHTS['Location_Match']
             )
             
             matches.append({
@@ -85,7 +120,108 @@ def prepare_matching_data():
                 'Is_Match': weighted_match >= 60  # Consider it a match if total weighted score is >= 70%
             })
     
-    return pd.DataFrame(matches)
+    count('pairs_scored', len(matches))
+    return normalize_matches(pd.DataFrame(matches))
+
+def match_block_arrays(candidate_df, job_df, skill_matcher):
+    """
+    match_block's features as candidate x job arrays, one row per pair in the same order.
+    Every feature is computed in float64 with the same operations as the pair loop, so the
+    table is identical.
+    """
+    n_candidates, n_jobs = len(candidate_df), len(job_df)
+    
+    def candidate_column(name):
+        return candidate_df[name].to_numpy(dtype=np.float64)[:, None]
+    
+    def job_column(name):
+        return job_df[name].to_numpy(dtype=np.float64)[None, :]
+    
+    skill_match = skill_matcher.score(candidate_df['Skills'], dtype=np.float64)
+    
+    experience, min_experience = candidate_column('Experience (Years)'), job_column('Min Experience (Years)')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        experience_match = np.where(experience >= min_experience, 100.0,
+                                    np.where(min_experience > 0, experience / min_experience * 100, 100.0))
+    
+    degree, required_degree = degree_levels(candidate_df['Degree']), degree_levels(job_df['Degree Requirement'])
+    degree_match = np.where(degree[:, None] >= required_degree[None, :], 100.0, 0.0)
+    
+    expected, offered = candidate_column('Expected Salary'), job_column('Salary Offered (In INR)')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        salary_match = np.where(expected <= offered, 100.0, offered / expected * 100)
+    
+    # Text columns compared as codes of one shared factorization
+    codes, _ = pd.factorize(np.concatenate([candidate_df['Location'].to_numpy(dtype=object),
+                                            job_df['Location'].to_numpy(dtype=object)]))
+    location_match = np.where(codes[:n_candidates, None] == codes[None, n_candidates:], 100.0, 0.0)
+    
+    remote = candidate_df['Remote'].to_numpy(dtype=object)[:, None]
+    remote_allowed = job_df['Remote Allowed'].to_numpy(dtype=object)[None, :]
+    remote_match = np.where(((remote_allowed == 'Yes') & (remote == 'Yes')) |
+                            ((remote_allowed == 'No') & (remote == 'No')), 100.0, 0.0)
+    
+    # Same order of additions as the pair loop
+    weighted_match = (
+        skill_match * DEFAULT_WEIGHTS['Skill_Match'] +
+        experience_match * DEFAULT_WEIGHTS['Experience_Match'] +
+        degree_match * DEFAULT_WEIGHTS['Degree_Match'] +
+        salary_match * DEFAULT_WEIGHTS['Salary_Match'] +
+        remote_match * DEFAULT_WEIGHTS['Remote_Match'] +
+        location_match * DEFAULT_WEIGHTS['Location_Match']
+    )
+    
+    return pd.DataFrame({
+        'CandidateID': np.repeat(candidate_df['CandidateID'].to_numpy(), n_jobs),
+        'JobID': np.tile(job_df['JobID'].to_numpy(), n_candidates),
+        'Skill_Match': skill_match.ravel(),
+        'Experience_Match': experience_match.ravel(),
+        'Degree_Match': degree_match.ravel(),
+        'Salary_Match': salary_match.ravel(),
+        'Location_Match': location_match.ravel(),
+        'Remote_Match': remote_match.ravel(),
+        'Total_Match_Score': weighted_match.ravel(),
+        'Is_Match': weighted_match.ravel() >= 60,
+    })
+
+def prepare_matching_data(candidate_df, job_df, block_size=BLOCK_SIZE, checkpoint_dir=None, resume=False,
+                          skill_scorer='pairwise'):
+    """
+    Prepare cross-product of candidates and jobs with feature engineering, one block of
+    candidates at a time
+    
+    Parameters:
+    checkpoint_dir: if given, every finished block is saved there
+    resume: skip the blocks already saved in checkpoint_dir by an earlier, interrupted run
+    skill_scorer: 'pairwise' (calculate_skill_match per pair) or 'sparse' (skill_matrix.py,
+                  same values)
+    """
+    skill_matcher = SkillMatcher(job_df['Required Skills']) if skill_scorer == 'sparse' else None
+    
+    # Identifies the input, so blocks of a different dataset are never reused
+    fingerprint = (int(pd.util.hash_pandas_object(candidate_df, index=False).sum()),
+                   int(pd.util.hash_pandas_object(job_df, index=False).sum()), block_size)
+    state_file = os.path.join(checkpoint_dir, 'state.pkl') if checkpoint_dir else None
+    state = load_checkpoint(state_file, fingerprint) if resume and state_file else None
+    completed_blocks = state['completed_blocks'] if state else 0
+    if completed_blocks:
+        print(f"Resuming after {completed_blocks} completed candidate blocks")
+    
+    blocks = []
+    for block_idx, start in enumerate(range(0, len(candidate_df), block_size)):
+        block_file = os.path.join(checkpoint_dir, f'block_{block_idx:06d}.parquet') if checkpoint_dir else None
+        if block_idx < completed_blocks:
+            blocks.append(pd.read_parquet(block_file))
+            continue
+        
+        block = match_block(candidate_df.iloc[start:start + block_size], job_df, skill_matcher)
+        if checkpoint_dir:
+            os.makedirs(checkpoint_dir, exist_ok=True)
+            block.to_parquet(block_file, index=False)
+            save_checkpoint(state_file, {'fingerprint': fingerprint, 'completed_blocks': block_idx + 1})
+        blocks.append(block)
+    
+    return pd.concat(blocks, ignore_index=True) if blocks else match_block(candidate_df, job_df, skill_matcher)
 
 def get_top_matches(match_df, n=5):
     """Get top N matches for each candidate"""
@@ -94,21 +230,43 @@ def get_top_matches(match_df, n=5):
                   .head(n)
 
 def main():
+    parser = argparse.ArgumentParser(description="Build the candidate x job match table")
+    parser.add_argument('--block-size', type=int, default=BLOCK_SIZE, help="candidates per checkpointed block")
+    parser.add_argument('--checkpoint', nargs='?', const=DEFAULT_CHECKPOINT, metavar='DIR',
+                        help=f"save every finished block to DIR (default {DEFAULT_CHECKPOINT})")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue from the last completed block (implies --checkpoint)")
+    parser.add_argument('--skill-scorer', choices=['pairwise', 'sparse'], default='pairwise',
+                        help="sparse: compute Skill_Match for a whole block as sparse matrix products")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        args.checkpoint = DEFAULT_CHECKPOINT
+    instrumentation.setup(args)
+    
     # Generate all matches
     print("Generating matches...")
-    matches_df = prepare_matching_data()
+    with stage('load_datasets'):
+        candidate_df, job_df = load_datasets()
+    with stage('prepare_matching_data'):
+        matches_df = prepare_matching_data(candidate_df, job_df, args.block_size, args.checkpoint, args.resume,
+                                           args.skill_scorer)
     
     # Get top 5 matches for each candidate
     top_matches = get_top_matches(matches_df, n=5)
     
-    # Save results
-    matches_df.to_csv('all_matches.csv', index=False)
+    # Save results, the checkpoints are no longer needed after that
+    with stage('write_matches'):
+        write_matches(matches_df, OUTPUT_FILE)
+    if args.checkpoint:
+        clear_checkpoint(args.checkpoint)
     
     # Print summary statistics
     print("\nMatching Summary:")
     print(f"Total possible combinations: {len(matches_df)}")
     print(f"Number of successful matches (>= 60% match score): {len(matches_df[matches_df['Is_Match']])}")
     print(f"Average match score: {matches_df['Total_Match_Score'].mean():.2f}%")
+    instrumentation.finish(args)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,193 @@
+import argparse
+import numpy as np
+import pandas as pd
+from storage import normalize_candidates, normalize_jobs
+
+# Predefined skill pools for each candidate job type (same pools as candidates.py used)
+candidate_skills_by_title = {
+    "Software Engineer": ["Java", "Python", "C++", "JavaScript", "React", "Node.js", "SQL"],
+    "Data Scientist": ["Python", "R", "SQL", "Machine Learning", "Deep Learning", "Pandas", "Scikit-learn"],
+    "Product Manager": ["Agile", "Scrum", "Project Management", "Communication", "Market Research", "Roadmapping", "Stakeholder Management"],
+    "Graphic Designer": ["Adobe Photoshop", "Illustrator", "UI/UX Design", "Typography", "Sketch", "InVision", "Figma"],
+    "Accountant": ["Excel", "QuickBooks", "Tax Filing", "Financial Analysis", "Payroll Management", "Auditing", "SAP"],
+    "HR Specialist": ["Recruitment", "Employee Relations", "HR Policies", "Payroll", "Training", "Onboarding", "Compliance"]
+}
+
+# Predefined skill pools for each job title (same pools as job_listing.py used)
+job_skills_by_title = {
+    "Software Engineer": ["Java", "Python", "SQL", "React", "Node.js", "Docker", "Kubernetes"],
+    "Data Scientist": ["Python", "R", "SQL", "Machine Learning", "Deep Learning", "Pandas", "Scikit-learn"],
+    "Product Manager": ["Agile", "Scrum", "Project Management", "Communication", "Market Research", "Roadmapping", "Stakeholder Management"],
+    "Graphic Designer": ["Adobe Photoshop", "Illustrator", "UI/UX Design", "Typography", "Sketch", "InVision", "Figma"],
+    "Accountant": ["Excel", "QuickBooks", "Tax Filing", "Financial Analysis", "Payroll Management", "Auditing", "SAP"],
+    "Marketing Manager": ["SEO", "Content Marketing", "Google Analytics", "Social Media", "Email Marketing", "PPC", "Market Research"],
+    "Sales Executive": ["CRM", "Cold Calling", "Lead Generation", "Negotiation", "Presentation Skills", "Customer Service", "Salesforce"],
+    "HR Specialist": ["Recruitment", "Employee Relations", "HR Policies", "Payroll", "Training", "Onboarding", "Compliance"]
+}
+
+locations = ["Gurgaon", "Mumbai", "Chennai", "Bangalore", "Noida", "Hyderabad"]
+degrees = ["High School", "Bachelor's", "Master's", "PhD"]
+remote_options = ["Yes", "No"]
+salary_ranges = [(300000, 500000), (500000, 700000), (700000, 1000000), (1000000, 1500000)]
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+
+def sample_skills(rng, titles, title_names, skills_by_title, min_skills, max_skills):
+    """
+    Sample comma separated skill strings for every row, vectorized per job title.
+
+    Parameters:
+    rng: numpy Generator to draw from
+    titles: integer array of title codes (indexes into title_names)
+    title_names: list of job titles
+    skills_by_title: skill pool for each job title
+    min_skills, max_skills: inclusive bounds on the number of skills per row
+    """
+    skills = np.empty(len(titles), dtype=object)
+    counts = rng.integers(min_skills, max_skills + 1, size=len(titles))
+
+    for code, title in enumerate(title_names):
+        rows = np.flatnonzero(titles == code)
+        if len(rows) == 0:
+            continue
+        pool = np.array(skills_by_title[title], dtype=object)
+
+        # A random permutation of the pool per row: argsort of uniform keys
+        order = rng.random((len(rows), len(pool))).argsort(axis=1)
+        picked = pool[order[:, :max_skills]]
+
+        # Join the first n skills of each row, grouped by n so the join stays vectorized
+        for n in range(min_skills, max_skills + 1):
+            mask = counts[rows] == n
+            if not mask.any():
+                continue
+            joined = picked[mask, 0]
+            for i in range(1, n):
+                joined = joined + ", " + picked[mask, i]
+            skills[rows[mask]] = joined
+
+    return skills
+
+
+def generate_candidates(num_rows, seed=None, start_id=1):
+    """Generate a typed candidate DataFrame with the same columns candidates.py produced"""
+    rng = np.random.default_rng(seed)
+    title_names = list(candidate_skills_by_title.keys())
+    titles = rng.integers(0, len(title_names), size=num_rows)
+
+    return normalize_candidates(pd.DataFrame({
+        "CandidateID": np.arange(start_id, start_id + num_rows, dtype=np.int64),
+        "Job Type": np.array(title_names, dtype=object)[titles],
+        "Skills": sample_skills(rng, titles, title_names, candidate_skills_by_title, 3, 5),
+        "Experience (Years)": rng.integers(0, 21, size=num_rows),
+        "Location": np.array(locations, dtype=object)[rng.integers(0, len(locations), size=num_rows)],
+        "Degree": np.array(degrees, dtype=object)[rng.integers(0, len(degrees), size=num_rows)],
+        # Expected salary rounded to the nearest thousand
+        "Expected Salary": np.round(rng.uniform(30000, 150000, size=num_rows), -3),
+        "Remote": np.array(remote_options, dtype=object)[rng.integers(0, 2, size=num_rows)],
+    }))
+
+
+def generate_jobs(num_rows, seed=None, start_id=1):
+    """Generate a typed job DataFrame with the same columns job_listing.py produced"""
+    rng = np.random.default_rng(seed)
+    title_names = list(job_skills_by_title.keys())
+    titles = rng.integers(0, len(title_names), size=num_rows)
+
+    # Pick a salary range per row, draw inside it and round to the nearest lakh (100,000)
+    ranges = np.array(salary_ranges)[rng.integers(0, len(salary_ranges), size=num_rows)]
+    salaries = rng.integers(ranges[:, 0], ranges[:, 1] + 1)
+    salaries = (np.round(salaries / 100000) * 100000).astype(np.int64)
+
+    return normalize_jobs(pd.DataFrame({
+        "JobID": np.arange(start_id, start_id + num_rows, dtype=np.int64),
+        "Title": np.array(title_names, dtype=object)[titles],
+        "Required Skills": sample_skills(rng, titles, title_names, job_skills_by_title, 3, 4),
+        "Min Experience (Years)": rng.integers(0, 16, size=num_rows),
+        "Location": np.array(locations, dtype=object)[rng.integers(0, len(locations), size=num_rows)],
+        "Degree Requirement": np.array(degrees, dtype=object)[rng.integers(0, len(degrees), size=num_rows)],
+        "Salary Offered (In INR)": salaries,
+        "Remote Allowed": np.array(remote_options, dtype=object)[rng.integers(0, 2, size=num_rows)],
+    }))
+
+
+def generate_chunks(generator, num_rows, seed=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield DataFrames of at most chunk_size rows until num_rows rows were produced.
+    Every chunk gets its own child seed, so the output only depends on seed and chunk_size.
+    """
+    n_chunks = max(1, -(-num_rows // chunk_size))
+    if isinstance(seed, np.random.SeedSequence):
+        # spawn() advances the caller's sequence, so spawn from a copy to keep the output repeatable
+        seed = np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key, pool_size=seed.pool_size)
+    else:
+        seed = np.random.SeedSequence(seed)
+    child_seeds = seed.spawn(n_chunks)
+
+    for chunk_idx, child_seed in enumerate(child_seeds):
+        start = chunk_idx * chunk_size
+        rows = min(chunk_size, num_rows - start)
+        if rows <= 0:
+            break
+        yield generator(rows, seed=child_seed, start_id=start + 1)
+
+
+def positive_int(value):
+    """argparse type for row and chunk counts, which must be at least 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def write_dataset(generator, num_rows, output_file, seed=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream generated chunks to a CSV or Parquet file (picked from the file extension),
+    so only one chunk is held in memory at a time.
+    """
+    # No rows would mean no file at all (the schema comes from the first chunk)
+    if num_rows < 1 or chunk_size < 1:
+        raise ValueError(f"num_rows and chunk_size must be at least 1, got {num_rows} and {chunk_size}")
+    if output_file.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for chunk in generate_chunks(generator, num_rows, seed, chunk_size):
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_file, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        for chunk_idx, chunk in enumerate(generate_chunks(generator, num_rows, seed, chunk_size)):
+            chunk.to_csv(output_file, mode="w" if chunk_idx == 0 else "a",
+                         header=chunk_idx == 0, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic candidate and job datasets")
+    parser.add_argument("--candidates", type=positive_int, default=500, help="number of candidate rows")
+    parser.add_argument("--jobs", type=positive_int, default=100, help="number of job rows")
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible output")
+    parser.add_argument("--chunk-size", type=positive_int, default=DEFAULT_CHUNK_SIZE, help="rows generated per chunk")
+    parser.add_argument("--candidate-output", default="candidate_mock_data.csv")
+    parser.add_argument("--job-output", default="job_mock_data.csv")
+    args = parser.parse_args()
+
+    # Derive independent seeds for both datasets from the single seed argument
+    candidate_seed, job_seed = np.random.SeedSequence(args.seed).spawn(2)
+
+    write_dataset(generate_candidates, args.candidates, args.candidate_output, candidate_seed, args.chunk_size)
+    write_dataset(generate_jobs, args.jobs, args.job_output, job_seed, args.chunk_size)
+
+    print(f"{args.candidates} candidates written to {args.candidate_output}")
+    print(f"{args.jobs} jobs written to {args.job_output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,34 @@
+import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+import instrumentation
+from instrumentation import stage, count
 
+@stage('calculate_displacement')
 def calculate_displacement(original_prefs, matched_pairs):
     """
     Calculate displacement for each entity based on their original preferences
     
     Parameters:
     - original_prefs: List of original preference lists
-    - matched_pairs: List of matched pairs in the current round
+    - matched_pairs: List of (entity, partner) pairs in the current round, entity being the
+      1-based index into original_prefs (pass (job, candidate) pairs for the jobs' side)
     
     Returns:
     - List of displacements
     """
     displacements = []
     
+    # Partner of every entity: the first pair (in order) that starts with it. Only the
+    # entity side is looked up, candidate and job IDs overlap and must not be mixed up
+    partners = {}
+    for entity, partner in matched_pairs:
+        partners.setdefault(entity, partner)
+    
     for entity_idx, entity_prefs in enumerate(original_prefs, 1):
         # Find the matched partner for this entity
-        matched_partner = None
-        for pair in matched_pairs:
-            if pair[0] == entity_idx:
-                matched_partner = pair[1]
-                break
-            elif pair[1] == entity_idx:
-                matched_partner = pair[0]
-                break
+        matched_partner = partners.get(entity_idx)
         
         if matched_partner is not None:
             # If partner is in preferences, calculate displacement
@@ -38,6 +42,7 @@ def calculate_displacement(original_prefs, matched_pairs):
             # If no match found
             displacements.append(len(entity_prefs))
     
+    count('entities', len(displacements))
     return displacements
 
 def analyze_displacements(candidates_file, jobs_file, original_candidate_prefs, original_job_prefs, k):
@@ -120,24 +125,37 @@ def load_original_preferences(filename):
             prefs.append(pref_list)
     return prefs
 
-# Main analysis
-original_candidate_prefs = load_original_preferences('candidate_preferences.csv')
-original_job_prefs = load_original_preferences('job_preferences.csv')
-k = 10  # Set the desired number of rounds
-
-candidate_displacements, job_displacements, num_rounds = analyze_displacements(
-    'candidate_pairs.csv', 
-    'job_pairs.csv', 
-    original_candidate_prefs, 
-    original_job_prefs,
-    k
-)
-
-# Print average displacements
-print("Candidate Average Displacements per Round:", candidate_displacements[:num_rounds])
-print("Job Average Displacements per Round:", job_displacements[:num_rounds])
-
-# Plot the graph
-plot_displacement_graph(candidate_displacements, job_displacements, num_rounds)
+def main():
+    parser = argparse.ArgumentParser(description="Average displacement per MMDAA round")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+    
+    # Main analysis
+    with stage('load_preferences'):
+        original_candidate_prefs = load_original_preferences('candidate_preferences.csv')
+        original_job_prefs = load_original_preferences('job_preferences.csv')
+    k = 10  # Set the desired number of rounds
+    
+    with stage('analyze_displacements'):
+        candidate_displacements, job_displacements, num_rounds = analyze_displacements(
+            'candidate_pairs.csv', 
+            'job_pairs.csv', 
+            original_candidate_prefs, 
+            original_job_prefs,
+            k
+        )
+    
+    # Print average displacements
+    print("Candidate Average Displacements per Round:", candidate_displacements[:num_rounds])
+    print("Job Average Displacements per Round:", job_displacements[:num_rounds])
+    
+    # Plot the graph
+    with stage('plot'):
+        plot_displacement_graph(candidate_displacements, job_displacements, num_rounds)
+    
+    print(f"Graph saved as displacement_graph.png (showing {num_rounds} rounds)")
+    instrumentation.finish(args)
 
-print(f"Graph saved as displacement_graph.png (showing {num_rounds} rounds)")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+import heapq
+from collections import deque
+
+UNRANKED = float('inf')
+
+
+class DynamicMatching:
+    """
+    Candidate-proposing deferred acceptance that can be repaired after small changes.
+
+    Preferences use the 0-based indexing of DAA.py. With mutual=False an employer accepts any
+    proposal while unmatched (like DAA.deferred_acceptance); with mutual=True it only accepts
+    candidates on its own list (like MMDAA.run_daa).
+
+    Start from a previous stable matching (candidate_matches as returned by
+    DAA.deferred_acceptance), apply changes with the add_/remove_/set_ methods and call
+    repair(). Only the agents touched by a change propose again, so a repair costs about the
+    size of the change instead of the size of the market.
+    """
+
+    def __init__(self, candidates_prefs, employers_prefs, candidate_matches=None, mutual=False):
+        self.mutual = mutual
+        self.candidates_prefs = []
+        self.employers_prefs = []
+        self.candidate_rank = []
+        self.employer_rank = []
+        # employer -> heap of (employer's rank, candidate) of the candidates that proposed to it
+        # (or passed it in the previous matching), for rescanning weakened employers. Entries
+        # of candidates that no longer prefer the employer are dropped lazily.
+        self.proposers = [[] for _ in employers_prefs]
+        self.removed_employers = set()
+
+        self.candidate_match = [-1] * len(candidates_prefs)
+        self.employer_match = [-1] * len(employers_prefs)
+        # Position in the candidate's list of the next employer to propose to
+        self.next_proposal = [0] * len(candidates_prefs)
+
+        self._free = deque()
+        self._weakened = set()
+        self._touched_candidates = set()
+        self._touched_employers = set()
+        # Agents whose partner changed in the last round of changes + repair()
+        self.changed_candidates = set()
+        self.changed_employers = set()
+
+        for employer, prefs in enumerate(employers_prefs):
+            self.employers_prefs.append(list(prefs))
+            self.employer_rank.append({c: rank for rank, c in enumerate(prefs)})
+        for candidate, prefs in enumerate(candidates_prefs):
+            self.candidates_prefs.append(list(prefs))
+            self.candidate_rank.append({e: rank for rank, e in enumerate(prefs)})
+
+        if candidate_matches is None:
+            # No previous matching: everyone proposes from the top
+            self._free.extend(range(len(candidates_prefs)))
+            self.repair()
+        else:
+            for candidate, employer in enumerate(candidate_matches):
+                if employer == -1:
+                    # An unmatched candidate has already been rejected by its whole list
+                    self.next_proposal[candidate] = len(self.candidates_prefs[candidate])
+                else:
+                    self.candidate_match[candidate] = employer
+                    self.employer_match[employer] = candidate
+                    self.next_proposal[candidate] = self.candidate_rank[candidate][employer] + 1
+                # The candidate proposed to everything down to its match before
+                for proposed in self.candidates_prefs[candidate][:self.next_proposal[candidate]]:
+                    self.proposers[proposed].append((self.employer_rank[proposed].get(candidate, UNRANKED), candidate))
+            for heap in self.proposers:
+                heapq.heapify(heap)
+
+    @property
+    def candidate_matches(self):
+        """candidate -> employer (-1 if unmatched), the format of DAA.deferred_acceptance"""
+        return list(self.candidate_match)
+
+    # Changes
+
+    def add_candidate(self, prefs):
+        """Add a candidate with the given preference list, returns its index"""
+        candidate = len(self.candidates_prefs)
+        self.candidates_prefs.append([])
+        self.candidate_rank.append({})
+        self.candidate_match.append(-1)
+        self.next_proposal.append(0)
+        self.set_candidate_prefs(candidate, prefs)
+        return candidate
+
+    def add_employer(self, prefs):
+        """Add an employer with the given preference list, returns its index"""
+        employer = len(self.employers_prefs)
+        self.employers_prefs.append([])
+        self.employer_rank.append({})
+        self.employer_match.append(-1)
+        self.proposers.append([])
+        self.set_employer_prefs(employer, prefs)
+        return employer
+
+    def remove_candidate(self, candidate):
+        """Remove a candidate; its index stays reserved with an empty list"""
+        self.set_candidate_prefs(candidate, [])
+
+    def remove_employer(self, employer):
+        """Remove an employer; its index stays reserved and it rejects every proposal"""
+        self.removed_employers.add(employer)
+        self.set_employer_prefs(employer, [])
+        holder = self.employer_match[employer]
+        if holder != -1:
+            self._unmatch(holder, employer)
+            self._free.append(holder)
+
+    def set_candidate_prefs(self, candidate, prefs):
+        """Replace a candidate's preference list, it then proposes again from the top"""
+        self.candidates_prefs[candidate] = list(prefs)
+        self.candidate_rank[candidate] = {e: rank for rank, e in enumerate(prefs)}
+
+        employer = self.candidate_match[candidate]
+        if employer != -1:
+            self._unmatch(candidate, employer)
+            self._weakened.add(employer)
+        self.next_proposal[candidate] = 0
+        self._free.append(candidate)
+
+    def set_employer_prefs(self, employer, prefs):
+        """Replace an employer's preference list, candidates it rejected may now be accepted"""
+        self.employers_prefs[employer] = list(prefs)
+        self.employer_rank[employer] = {c: rank for rank, c in enumerate(prefs)}
+        # Order the proposers by the new list
+        ranks = self.employer_rank[employer]
+        self.proposers[employer] = [(ranks.get(c, UNRANKED), c) for c in {c for _, c in self.proposers[employer]}]
+        heapq.heapify(self.proposers[employer])
+
+        holder = self.employer_match[employer]
+        if holder != -1 and self.mutual and holder not in self.employer_rank[employer]:
+            # The current partner is no longer acceptable
+            self._unmatch(holder, employer)
+            self._free.append(holder)
+        self._weakened.add(employer)
+
+    # Repair
+
+    def repair(self):
+        """
+        Restore stability after the changes made since the last repair.
+        Returns: number of proposals made
+        """
+        self.proposals = 0
+
+        while self._free or self._weakened:
+            if self._weakened:
+                self._rescan(self._weakened.pop())
+                continue
+
+            candidate = self._free.popleft()
+            prefs = self.candidates_prefs[candidate]
+            # Propose down the list until accepted or the list runs out
+            while self.candidate_match[candidate] == -1 and self.next_proposal[candidate] < len(prefs):
+                employer = prefs[self.next_proposal[candidate]]
+                self.next_proposal[candidate] += 1
+                self._propose(candidate, employer)
+
+        self.changed_candidates, self._touched_candidates = self._touched_candidates, set()
+        self.changed_employers, self._touched_employers = self._touched_employers, set()
+        return self.proposals
+
+    def _rescan(self, employer):
+        """
+        An employer lost its partner or changed its list: find the candidate it likes best
+        among those who would leave their current match for it, and match them.
+        Costs the stale proposers dropped on the way, not the employer's popularity.
+        """
+        if employer in self.removed_employers:
+            return
+        heap = self.proposers[employer]
+        holder_entries = []
+        best = None
+        while heap:
+            _, candidate = heap[0]
+            rank = self.candidate_rank[candidate].get(employer)
+            # The candidate no longer prefers this employer to where it stands now
+            if rank is None or rank >= self.next_proposal[candidate]:
+                heapq.heappop(heap)
+            elif self.candidate_match[candidate] == employer:
+                holder_entries.append(heapq.heappop(heap))
+            else:
+                best = candidate
+                break
+        for entry in holder_entries:
+            heapq.heappush(heap, entry)
+
+        if best is not None:
+            self._propose(best, employer)
+
+    def _accepts(self, employer, candidate):
+        """Whether the employer takes this candidate over its current partner"""
+        if employer in self.removed_employers:
+            return False
+        rank = self.employer_rank[employer].get(candidate, UNRANKED)
+        if rank == UNRANKED and self.mutual:
+            return False
+        holder = self.employer_match[employer]
+        if holder == -1:
+            return True
+        return rank < self.employer_rank[employer].get(holder, UNRANKED)
+
+    def _propose(self, candidate, employer):
+        self.proposals += 1
+        heapq.heappush(self.proposers[employer], (self.employer_rank[employer].get(candidate, UNRANKED), candidate))
+        if not self._accepts(employer, candidate):
+            return
+
+        holder = self.employer_match[employer]
+        if holder != -1:
+            # The displaced candidate continues below this employer on its list
+            self._unmatch(holder, employer)
+            self._free.append(holder)
+
+        previous = self.candidate_match[candidate]
+        if previous != -1:
+            # The candidate moved up to a better employer, its old one is free again
+            self._unmatch(candidate, previous)
+            self._weakened.add(previous)
+
+        self.candidate_match[candidate] = employer
+        self.employer_match[employer] = candidate
+        self.next_proposal[candidate] = self.candidate_rank[candidate][employer] + 1
+        self._touched_candidates.add(candidate)
+        self._touched_employers.add(employer)
+
+    def _unmatch(self, candidate, employer):
+        self.candidate_match[candidate] = -1
+        self.employer_match[employer] = -1
+        self._touched_candidates.add(candidate)
+        self._touched_employers.add(employer)
+
+
+class DynamicMultiMatching:
+    """
+    Repairable version of MMDAA.multi_match_daa: one DynamicMatching (mutual acceptance) per
+    round, each on the preferences left after the earlier rounds. A change is repaired in
+    round 1 first; agents whose partner changed there get new residual lists in round 2,
+    and so on, so only the agents reached by the change propose again.
+
+    Preferences and all_matches use the 1-based IDs of MMDAA.py.
+    """
+
+    def __init__(self, candidates_prefs, employers_prefs, k, all_matches=None):
+        if all_matches is not None and len(all_matches) > k:
+            raise ValueError(f"all_matches has {len(all_matches)} rounds, more than k={k}")
+        self.candidates_prefs = [[e - 1 for e in prefs] for prefs in candidates_prefs]
+        self.employers_prefs = [[c - 1 for c in prefs] for prefs in employers_prefs]
+        self.rounds = []
+
+        for round_idx in range(k):
+            # Rounds missing from all_matches (multi_match_daa stops at a round without
+            # matches, or it ran with a smaller k) are matched from scratch
+            previous = None
+            if all_matches is not None and round_idx < len(all_matches):
+                previous = [-1] * len(candidates_prefs)
+                for candidate, employer in all_matches[round_idx]:
+                    previous[candidate - 1] = employer - 1
+
+            candidates_residual = [self._candidate_residual(c, round_idx) for c in range(len(candidates_prefs))]
+            employers_residual = [self._employer_residual(e, round_idx) for e in range(len(employers_prefs))]
+            self.rounds.append(DynamicMatching(candidates_residual, employers_residual, previous, mutual=True))
+
+    @property
+    def all_matches(self):
+        """Matches per round as (candidate, employer) 1-based pairs, like multi_match_daa"""
+        all_matches = []
+        for matching in self.rounds:
+            matches = [(c + 1, e + 1) for c, e in enumerate(matching.candidate_match) if e != -1]
+            if not matches:
+                break
+            all_matches.append(matches)
+        return all_matches
+
+    def _candidate_residual(self, candidate, round_idx):
+        """Candidate's list without the employers it was matched to in earlier rounds"""
+        taken = {self.rounds[r].candidate_match[candidate] for r in range(round_idx)}
+        return [e for e in self.candidates_prefs[candidate] if e not in taken]
+
+    def _employer_residual(self, employer, round_idx):
+        taken = {self.rounds[r].employer_match[employer] for r in range(round_idx)}
+        return [c for c in self.employers_prefs[employer] if c not in taken]
+
+    # Changes (1-based IDs, like MMDAA.py)
+
+    def add_candidate(self, prefs):
+        """Add a candidate, returns its 1-based ID"""
+        self.candidates_prefs.append([e - 1 for e in prefs])
+        for matching in self.rounds:
+            matching.add_candidate([])
+        candidate = len(self.candidates_prefs) - 1
+        self._cascade({candidate}, set())
+        return candidate + 1
+
+    def add_employer(self, prefs):
+        """Add an employer, returns its 1-based ID"""
+        self.employers_prefs.append([c - 1 for c in prefs])
+        for matching in self.rounds:
+            matching.add_employer([])
+        employer = len(self.employers_prefs) - 1
+        self._cascade(set(), {employer})
+        return employer + 1
+
+    def remove_candidate(self, candidate):
+        self.set_candidate_prefs(candidate, [])
+
+    def remove_employer(self, employer):
+        # With mutual acceptance an employer with an empty list rejects everyone
+        self.set_employer_prefs(employer, [])
+
+    def set_candidate_prefs(self, candidate, prefs):
+        self.candidates_prefs[candidate - 1] = [e - 1 for e in prefs]
+        self._cascade({candidate - 1}, set())
+
+    def set_employer_prefs(self, employer, prefs):
+        self.employers_prefs[employer - 1] = [c - 1 for c in prefs]
+        self._cascade(set(), {employer - 1})
+
+    def _cascade(self, changed_candidates, changed_employers):
+        """Update residual lists round by round and repair each round"""
+        proposals = 0
+        for round_idx, matching in enumerate(self.rounds):
+            for candidate in changed_candidates:
+                residual = self._candidate_residual(candidate, round_idx)
+                if residual != matching.candidates_prefs[candidate]:
+                    matching.set_candidate_prefs(candidate, residual)
+            for employer in changed_employers:
+                residual = self._employer_residual(employer, round_idx)
+                if residual != matching.employers_prefs[employer]:
+                    matching.set_employer_prefs(employer, residual)
+
+            proposals += matching.repair()
+            # Agents whose partner changed here have different residual lists from now on
+            changed_candidates = changed_candidates | matching.changed_candidates
+            changed_employers = changed_employers | matching.changed_employers
+        return proposals
@@ -0,0 +1,157 @@
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import ContextDecorator
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Aggregated measurements of every stage, by name, in the order the stages were first entered
+_stages = {}
+# Stages currently running, innermost last
+_active = []
+_settings = {'profile_dir': None, 'trace_memory': False}
+_profiles = {}
+_started = time.perf_counter()
+
+
+def add_arguments(parser):
+    """Add the instrumentation options to a script's argparse parser"""
+    parser.add_argument('--report', metavar='FILE', help="write a JSON report of the stage timings and counters")
+    parser.add_argument('--profile-dir', metavar='DIR', help="write a cProfile dump of every stage to DIR")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="measure the peak Python heap of every stage with tracemalloc (slower)")
+
+
+def configure(profile_dir=None, trace_memory=False):
+    """Enable the optional (more expensive) measurements"""
+    _settings['profile_dir'] = profile_dir
+    _settings['trace_memory'] = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def setup(args):
+    """configure() from the options added by add_arguments"""
+    configure(args.profile_dir, args.trace_memory)
+
+
+def peak_rss_mb(children=False):
+    """Peak resident set size of this process (or of its finished child processes) so far, in MB"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return usage.ru_maxrss / (1 << 20 if sys.platform == 'darwin' else 1 << 10)
+
+
+class stage(ContextDecorator):
+    """
+    Time a stage of the pipeline, as a context manager or a function decorator:
+
+        with stage('scoring'):
+            ...
+            count('pairs_scored', len(df))
+
+    Repeated runs of a stage name are added up; a run nested in a running stage of the same
+    name (recursion) is already covered by the outer run and only adds to the calls. Every
+    stage records wall and CPU time, the peak RSS of the process and, when enabled, the
+    tracemalloc peak and a cProfile dump.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def _recreate_cm(self):
+        # Every call of a decorated function gets its own instance, so nested and recursive
+        # calls do not overwrite each other's start times
+        return stage(self.name)
+
+    def __enter__(self):
+        record = _stages.setdefault(self.name, {'calls': 0, 'seconds': 0.0, 'cpu_seconds': 0.0, 'counters': {}})
+        record['calls'] += 1
+
+        if tracemalloc.is_tracing():
+            # The enclosing stage keeps the peak reached so far, this stage measures its own
+            if _active:
+                _active[-1].heap_peak = max(_active[-1].heap_peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            self.heap_peak = 0
+
+        # Only one profiler can be active, an enclosing profiled stage already covers this one
+        self.profile = None
+        if _settings['profile_dir'] and not any(outer.profile for outer in _active):
+            self.profile = _profiles.setdefault(self.name, cProfile.Profile())
+            self.profile.enable()
+
+        _active.append(self)
+        self.start_cpu = time.process_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        cpu_seconds = time.process_time() - self.start_cpu
+        _active.pop()
+
+        if self.profile is not None:
+            self.profile.disable()
+            os.makedirs(_settings['profile_dir'], exist_ok=True)
+            self.profile.dump_stats(os.path.join(_settings['profile_dir'], f'{self.name}.prof'))
+
+        record = _stages[self.name]
+        if not any(outer.name == self.name for outer in _active):
+            record['seconds'] += seconds
+            record['cpu_seconds'] += cpu_seconds
+        record['peak_rss_mb'] = peak_rss_mb()
+        record['children_peak_rss_mb'] = peak_rss_mb(children=True)
+
+        if tracemalloc.is_tracing():
+            heap_peak = max(self.heap_peak, tracemalloc.get_traced_memory()[1])
+            record['heap_peak_mb'] = max(record.get('heap_peak_mb', 0), heap_peak / (1 << 20))
+            if _active:
+                _active[-1].heap_peak = max(_active[-1].heap_peak, heap_peak)
+            tracemalloc.reset_peak()
+        return False
+
+
+def count(name, value=1):
+    """Add to a counter of the innermost running stage (or of the run if no stage is running)"""
+    counters = _stages[_active[-1].name]['counters'] if _active else _stages.setdefault('run', {'counters': {}})['counters']
+    counters[name] = counters.get(name, 0) + value
+
+
+def report():
+    """
+    All measurements so far: per stage the totals, counters and counters per second
+    """
+    stages = {}
+    for name, record in _stages.items():
+        stages[name] = dict(record)
+        if record.get('seconds'):
+            stages[name]['rates'] = {f'{counter}_per_sec': value / record['seconds']
+                                     for counter, value in record['counters'].items()}
+    return {
+        'argv': sys.argv,
+        'total_seconds': time.perf_counter() - _started,
+        'peak_rss_mb': peak_rss_mb(),
+        'stages': stages,
+    }
+
+
+def write_report(path):
+    """Write report() as JSON"""
+    with open(path, 'w') as f:
+        json.dump(report(), f, indent=2)
+    print(f"Run report written to {path}")
+
+
+def finish(args):
+    """Write the report if the script was asked to (--report)"""
+    if args.report:
+        write_report(args.report)
@@ -1,18 +1,43 @@
-import pandas as pd
+import argparse
+import os
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error
 import xgboost as xgb
 import matplotlib.pyplot as plt
-
-# Load dataset
-data = pd.read_csv('all_matches.csv')
+from storage import load_matches, write_matches
+from score_matrix import save_score_matrix, to_long_format
+from tree_evaluator import export_booster
+from checkpoint import CHECKPOINT_DIR, fingerprint, save_checkpoint, load_checkpoint, clear_checkpoint
+import instrumentation
+from instrumentation import stage, count
+
+DEFAULT_CHECKPOINT = os.path.join(CHECKPOINT_DIR, 'job_matching.pkl')
+
+parser = argparse.ArgumentParser(description="Train the match score model and score every candidate/job pair")
+parser.add_argument('--export-long', metavar='FILE',
+                    help="also write the predictions as a long (CandidateID, JobID, Predicted) table")
+parser.add_argument('--checkpoint', nargs='?', const=DEFAULT_CHECKPOINT, metavar='FILE',
+                    help=f"save every evaluated configuration to FILE (default {DEFAULT_CHECKPOINT}), "
+                         "with the best model so far next to it")
+parser.add_argument('--resume', action='store_true',
+                    help="skip the hyperparameter configurations an interrupted run already evaluated "
+                         "(implies --checkpoint)")
+instrumentation.add_arguments(parser)
+args = parser.parse_args()
+if args.resume and not args.checkpoint:
+    args.checkpoint = DEFAULT_CHECKPOINT
+instrumentation.setup(args)
 
 # Feature Engineering
 features = ['Skill_Match', 'Experience_Match', 'Location_Match', 
             'Salary_Match', 'Remote_Match', 'Degree_Match']
 target = 'Total_Match_Score'  # Use Total Match as the regression target
 
+# Load dataset (only the ID, feature and target columns)
+with stage('load_matches'):
+    data = load_matches('all_matches.parquet', columns=['CandidateID', 'JobID'] + features + [target])
+
 # Check if target exists
 if target not in data.columns:
     raise ValueError(f"The target column '{target}' does not exist in the dataset.")
@@ -22,9 +47,9 @@ data = data.dropna(subset=features)  # Drop rows where any feature is missing
 X = data[features]
 y = data[target]
 
-# Get the full list of JobID and CandidateID
-all_candidate_ids = data['CandidateID'].unique()
-all_job_ids = data['JobID'].unique()
+# Get the full (sorted) list of JobID and CandidateID, these label the prediction matrix
+all_candidate_ids = np.unique(data['CandidateID'].to_numpy())
+all_job_ids = np.unique(data['JobID'].to_numpy())
 
 # Split into training, validation, and testing sets
 X_train, X_temp, y_train, y_temp = train_test_split(X, y, test_size=0.3, random_state=42)  # 70% for training
@@ -46,11 +71,27 @@ param_grid = {
 best_model = None
 best_mse = float('inf')
 
+# With --checkpoint every evaluated configuration is saved, with the best model so far next to it
+checkpoint_file = args.checkpoint
+checkpoint_model_file = os.path.splitext(checkpoint_file)[0] + '_best.json' if checkpoint_file else None
+grid_fingerprint = fingerprint(param_grid, len(data), float(y.sum()))
+completed = {}
+state = load_checkpoint(checkpoint_file, grid_fingerprint) if args.resume else None
+if state:
+    completed, best_mse = state['completed'], state['best_mse']
+    best_model = xgb.XGBRegressor()
+    best_model.load_model(checkpoint_model_file)
+    print(f"Resuming after {len(completed)} evaluated configurations (best validation MSE: {best_mse:.4f})")
+
 for n_estimators in param_grid['n_estimators']:
     for learning_rate in param_grid['learning_rate']:
         for max_depth in param_grid['max_depth']:
             for subsample in param_grid['subsample']:
                 for colsample_bytree in param_grid['colsample_bytree']:
+                    config = (n_estimators, learning_rate, max_depth, subsample, colsample_bytree)
+                    if config in completed:
+                        continue
+                    
                     # Create model with selected parameters
                     model = xgb.XGBRegressor(
                         n_estimators=n_estimators,
@@ -63,10 +104,15 @@ for n_estimators in param_grid['n_estimators']:
                     )
 
                     # Fit the model on the training data
-                    model.fit(X_train, y_train)
+                    with stage('fit'):
+                        model.fit(X_train, y_train)
+                        count('configs_evaluated')
+                        count('rows_trained', len(X_train))
 
                     # Make predictions on the validation set
-                    y_val_pred = model.predict(X_val)
+                    with stage('validate'):
+                        y_val_pred = model.predict(X_val)
+                        count('pairs_scored', len(X_val))
 
                     # Evaluate the model using Mean Squared Error
                     mse = mean_squared_error(y_val, y_val_pred)
@@ -76,34 +122,49 @@ for n_estimators in param_grid['n_estimators']:
                     if mse < best_mse:
                         best_mse = mse
                         best_model = model
+                        if checkpoint_model_file:
+                            os.makedirs(os.path.dirname(checkpoint_model_file) or '.', exist_ok=True)
+                            best_model.save_model(checkpoint_model_file)
+                    
+                    completed[config] = mse
+                    if checkpoint_file:
+                        save_checkpoint(checkpoint_file, {'fingerprint': grid_fingerprint, 'completed': completed,
+                                                          'best_mse': best_mse})
 
 # Make predictions on the test set using the best model
-y_test_pred = best_model.predict(X_test)
+with stage('predict_test'):
+    y_test_pred = best_model.predict(X_test)
+    count('pairs_scored', len(X_test))
 
 # Evaluate the model using Mean Squared Error
 test_mse = mean_squared_error(y_test, y_test_pred)
 print(f"Test MSE: {test_mse:.4f}")
 
-# Ensure that all CandidateID and JobID pairs are included in the output
-full_mapping = pd.MultiIndex.from_product([all_candidate_ids, all_job_ids], names=["CandidateID", "JobID"]).to_frame(index=False)
+# Save the tuned model, plus its flattened node arrays for scoring without xgboost
+best_model.save_model('xgb_best_model.json')
+export_booster(best_model.get_booster(), 'xgb_compiled.npz')
+if checkpoint_file:
+    clear_checkpoint(checkpoint_file)
+    clear_checkpoint(checkpoint_model_file)
+
+# Lay predictions out as a candidate x job matrix, every combination gets a cell
+# Pairs without a prediction are filled with the mean prediction
+prediction_matrix = np.full((len(all_candidate_ids), len(all_job_ids)), y_test_pred.mean(), dtype=np.float32)
 
-# Merge predictions back into the full mapping
 X_test_with_ids = data.loc[X_test.index, ['CandidateID', 'JobID']]
-predictions_df = pd.DataFrame({
-    'CandidateID': X_test_with_ids['CandidateID'],
-    'JobID': X_test_with_ids['JobID'],
-    'Actual': y_test,
-    'Predicted': y_test_pred
-})
+rows = np.searchsorted(all_candidate_ids, X_test_with_ids['CandidateID'].to_numpy())
+cols = np.searchsorted(all_job_ids, X_test_with_ids['JobID'].to_numpy())
+prediction_matrix[rows, cols] = y_test_pred
 
-# Merge full mapping with predictions to ensure each combination is present
-final_output = full_mapping.merge(predictions_df, on=['CandidateID', 'JobID'], how='left')
+# Save the matrix with its ID labels
+with stage('save_predictions'):
+    save_score_matrix('predictions_matrix.npz', prediction_matrix, all_candidate_ids, all_job_ids)
 
-# Fill missing predictions with the mean or a default value if needed
-final_output['Predicted'].fillna(final_output['Predicted'].mean(), inplace=True)
+    # The long format table is only written on request
+    if args.export_long:
+        write_matches(to_long_format(prediction_matrix, all_candidate_ids, all_job_ids), args.export_long)
 
-# Save the final output to CSV
-final_output.to_csv('predictions_total_match_best.csv', index=False)
+instrumentation.finish(args)
 
 # Plot Actual vs Predicted
 plt.figure(figsize=(10, 6))
@@ -0,0 +1,191 @@
+import argparse
+import json
+import os
+import sqlite3
+from contextlib import closing
+
+STORE_FILE = 'match_store.db'
+
+# Rows per executemany call while loading
+INSERT_BATCH = 1_000_000
+
+# The scores table is stored in "top matches of a candidate" order (a clustered primary key)
+# and the job index holds the score too, so both lookups are a single range scan.
+# Indexes are created after loading, which is much faster than maintaining them per row.
+# Both tables are created whenever the store is written, so readers always find them.
+SCORES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    candidate_id INTEGER NOT NULL, job_id INTEGER NOT NULL, score REAL NOT NULL,
+    PRIMARY KEY (candidate_id, score DESC, job_id)
+) WITHOUT ROWID;
+"""
+SCORES_INDEXES = """
+CREATE INDEX IF NOT EXISTS scores_by_job ON scores (job_id, score DESC, candidate_id);
+"""
+ROUNDS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rounds (round INTEGER NOT NULL, candidate_id INTEGER NOT NULL, job_id INTEGER NOT NULL);
+"""
+ROUNDS_INDEXES = """
+CREATE INDEX IF NOT EXISTS rounds_by_candidate ON rounds (candidate_id, round, job_id);
+CREATE INDEX IF NOT EXISTS rounds_by_job ON rounds (job_id, round, candidate_id);
+"""
+
+
+def _connect(path, read_only=False):
+    """Connection to the store; read-only connections fail instead of creating a missing store"""
+    if read_only:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No match store at {path}, build it with match_store.py build")
+        return closing(sqlite3.connect(f'file:{path}?mode=ro', uri=True))
+    conn = sqlite3.connect(path)
+    # Bulk loads are rerun from the pipeline outputs if interrupted, durability is not needed
+    conn.execute('PRAGMA journal_mode = OFF')
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.executescript(SCORES_SCHEMA + ROUNDS_SCHEMA)
+    return closing(conn)
+
+
+def _replace(conn, table, schema, indexes, columns):
+    """Recreate a table from the given numpy column arrays, building its indexes afterwards"""
+    conn.execute(f'DROP TABLE IF EXISTS {table}')
+    conn.executescript(schema)
+    placeholders = ', '.join('?' * len(columns))
+    # Only one batch at a time is converted to Python objects
+    for start in range(0, len(columns[0]), INSERT_BATCH):
+        conn.executemany(f'INSERT INTO {table} VALUES ({placeholders})',
+                         zip(*(column[start:start + INSERT_BATCH].tolist() for column in columns)))
+    conn.executescript(indexes)
+    conn.execute('ANALYZE')
+    conn.commit()
+
+
+def store_scores(path, candidate_ids, job_ids, scores):
+    """Replace the pair scores (parallel arrays of candidate ID, job ID and score), pairs without a score are left out"""
+    import numpy as np
+    candidate_ids, job_ids, scores = np.asarray(candidate_ids), np.asarray(job_ids), np.asarray(scores)
+    scored = ~np.isnan(scores)
+    # Insert in primary key order, so the table is built by appending
+    order = np.lexsort((job_ids, -scores, candidate_ids))
+    order = order[scored[order]]
+    with _connect(path) as conn:
+        _replace(conn, 'scores', SCORES_SCHEMA, SCORES_INDEXES, [candidate_ids[order], job_ids[order], scores[order]])
+
+
+def store_rounds(path, all_matches):
+    """Replace the matching rounds, all_matches as returned by MMDAA.multi_match_daa"""
+    import numpy as np
+    rounds = np.array([round_idx for round_idx, matches in enumerate(all_matches, 1) for _ in matches], dtype=np.int64)
+    pairs = np.array([pair for matches in all_matches for pair in matches], dtype=np.int64).reshape(-1, 2)
+    with _connect(path) as conn:
+        _replace(conn, 'rounds', ROUNDS_SCHEMA, ROUNDS_INDEXES, [rounds, pairs[:, 0], pairs[:, 1]])
+
+
+def load_scores(scores_file, score_column='Total_Match_Score'):
+    """
+    Pair scores from a match table (combined_dataset.py / job_matching.py --export-long) or a
+    score matrix (.npz from job_matching.py)
+
+    Returns: candidate IDs, job IDs, scores
+    """
+    # Only needed to build the store, the query functions (and the Flask app) use sqlite3 alone
+    from score_matrix import load_score_matrix, to_long_format
+    from storage import load_matches
+    if scores_file.endswith('.npz'):
+        matrix, candidate_ids, job_ids = load_score_matrix(scores_file)
+        df = to_long_format(matrix, candidate_ids, job_ids, value_column=score_column)
+    else:
+        df = load_matches(scores_file, columns=['CandidateID', 'JobID', score_column])
+    return df['CandidateID'].to_numpy(), df['JobID'].to_numpy(), df[score_column].to_numpy()
+
+
+def _check_limit(n):
+    # SQLite reads a negative LIMIT as no limit at all
+    if n < 0:
+        raise ValueError(f"n must be 0 or more, got {n}")
+
+
+def top_matches(path, candidate_id, n=10):
+    """Best scored jobs of a candidate: list of {'job_id', 'score'}"""
+    _check_limit(n)
+    with _connect(path, read_only=True) as conn:
+        rows = conn.execute('SELECT job_id, score FROM scores WHERE candidate_id = ? '
+                            'ORDER BY score DESC, job_id LIMIT ?', (candidate_id, n)).fetchall()
+    return [{'job_id': job_id, 'score': score} for job_id, score in rows]
+
+
+def top_candidates(path, job_id, n=10):
+    """Best scored candidates of a job: list of {'candidate_id', 'score'}"""
+    _check_limit(n)
+    with _connect(path, read_only=True) as conn:
+        rows = conn.execute('SELECT candidate_id, score FROM scores WHERE job_id = ? '
+                            'ORDER BY score DESC, candidate_id LIMIT ?', (job_id, n)).fetchall()
+    return [{'candidate_id': candidate_id, 'score': score} for candidate_id, score in rows]
+
+
+def matched_candidates(path, job_id, round_idx=None):
+    """Candidates matched to a job, in one round or all of them: list of {'round', 'candidate_id'}"""
+    query = 'SELECT round, candidate_id FROM rounds WHERE job_id = ?'
+    params = [job_id]
+    if round_idx is not None:
+        query += ' AND round = ?'
+        params.append(round_idx)
+    with _connect(path, read_only=True) as conn:
+        rows = conn.execute(query + ' ORDER BY round, candidate_id', params).fetchall()
+    return [{'round': r, 'candidate_id': candidate_id} for r, candidate_id in rows]
+
+
+def matched_jobs(path, candidate_id, round_idx=None):
+    """Jobs a candidate was matched to, in one round or all of them: list of {'round', 'job_id'}"""
+    query = 'SELECT round, job_id FROM rounds WHERE candidate_id = ?'
+    params = [candidate_id]
+    if round_idx is not None:
+        query += ' AND round = ?'
+        params.append(round_idx)
+    with _connect(path, read_only=True) as conn:
+        rows = conn.execute(query + ' ORDER BY round, job_id', params).fetchall()
+    return [{'round': r, 'job_id': job_id} for r, job_id in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexed SQLite store of pair scores and matching rounds")
+    store = argparse.ArgumentParser(add_help=False)
+    store.add_argument('--store', default=STORE_FILE)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', parents=[store], help="load pair scores (preference_generator.py --store writes them too, MMDAA.py --store adds the matching rounds)")
+    build.add_argument('--scores', default='all_matches.parquet',
+                       help="match table (.parquet/.csv) or score matrix (.npz) to load")
+    build.add_argument('--score-column', default='Total_Match_Score',
+                       help="score column of a match table, e.g. Predicted for job_matching.py --export-long")
+
+    top = commands.add_parser('top', parents=[store], help="best scored jobs of a candidate (or candidates of a job)")
+    top.add_argument('--candidate', type=int)
+    top.add_argument('--job', type=int)
+    top.add_argument('-n', type=int, default=10)
+
+    matched = commands.add_parser('matched', parents=[store], help="matches of a candidate or job, optionally in one round")
+    matched.add_argument('--candidate', type=int)
+    matched.add_argument('--job', type=int)
+    matched.add_argument('--round', type=int)
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        candidate_ids, job_ids, scores = load_scores(args.scores, args.score_column)
+        store_scores(args.store, candidate_ids, job_ids, scores)
+        print(f"Stored {len(scores):,} pair scores from {args.scores} in {args.store}")
+        return
+
+    if (args.candidate is None) == (args.job is None):
+        parser.error("give exactly one of --candidate and --job")
+    if args.command == 'top':
+        result = (top_matches(args.store, args.candidate, args.n) if args.candidate is not None
+                  else top_candidates(args.store, args.job, args.n))
+    else:
+        result = (matched_jobs(args.store, args.candidate, args.round) if args.candidate is not None
+                  else matched_candidates(args.store, args.job, args.round))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
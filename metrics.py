@@ -0,0 +1,162 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from a quick lookup to a slow LLM call
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class _Metric:
+    """Base class of the metric types: a value per label combination, guarded by a lock"""
+
+    type_name = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, label_values):
+        if len(label_values) != len(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {label_values}")
+        return tuple(str(value) for value in label_values)
+
+    def _format_labels(self, key, extra=()):
+        pairs = list(zip(self.labels, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def render(self):
+        """
+        Renders the metric in the Prometheus text exposition format.
+
+        Returns:
+            str: HELP and TYPE lines followed by one sample line per value.
+        """
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. requests or errors."""
+
+    type_name = "counter"
+
+    def inc(self, *label_values, amount=1):
+        if amount < 0:
+            raise ValueError(f"{self.name} can only increase, got {amount}")
+        key = self._key(label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        return [f"{self.name}{self._format_labels(key)} {value}" for key, value in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. requests in flight."""
+
+    type_name = "gauge"
+
+    def inc(self, *label_values, amount=1):
+        key = self._key(label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *label_values, amount=1):
+        self.inc(*label_values, amount=-amount)
+
+    def _samples(self):
+        return [f"{self.name}{self._format_labels(key)} {value}" for key, value in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets, e.g. latencies."""
+
+    type_name = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *label_values):
+        key = self._key(label_values)
+        # Index of the first bucket the value fits in, the last slot is +Inf
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[slot] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, *label_values):
+        """Observes the duration of the enclosed block in seconds, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def _samples(self):
+        lines = []
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f"{self.name}_bucket{self._format_labels(key, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {cumulative}")
+        return lines
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# Every metric created, in creation order
+REGISTRY = []
+
+PHASE_LATENCY = Histogram(
+    "resume_phase_seconds",
+    "Time spent in each phase of /process (upload_save, llm_upload, generation, render).",
+    labels=("phase",),
+)
+REQUEST_LATENCY = Histogram("http_request_seconds", "Request latency by endpoint.", labels=("endpoint",))
+IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being handled.", labels=("endpoint",))
+REQUESTS = Counter("http_requests_total", "Requests handled, by endpoint and status.", labels=("endpoint", "status"))
+ERRORS = Counter("resume_errors_total", "Failed /process requests, by phase and exception type.",
+                 labels=("phase", "exception"))
+
+
+@contextmanager
+def phase(name):
+    """
+    Times a phase of /process and counts it as failed if it raises.
+
+    Args:
+        name (str): Phase label, e.g. "llm_upload".
+    """
+    with PHASE_LATENCY.time(name):
+        try:
+            yield
+        except Exception as e:
+            ERRORS.inc(name, type(e).__name__)
+            raise
+
+
+def render_all():
+    """
+    Renders every registered metric for the /metrics endpoint.
+
+    Returns:
+        str: Prometheus text exposition format.
+    """
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
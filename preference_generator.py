@@ -1,57 +1,88 @@
+import argparse
+import json
 import pandas as pd
+from score_matrix import load_score_matrix, from_long_format, to_long_format, top_n_preferences, positions_to_ids
+from scorer import FEATURES, make_scorer
+from data_generator import positive_int
+from storage import load_matches
+from match_store import store_scores
+import instrumentation
+from instrumentation import stage, count
 
-def create_preference_csv_files(top_n):
+def score_matrix_from_features(scorer, matches_file='all_matches.parquet'):
+    """
+    Score every pair of the match table with the given scorer
+    Returns: candidate x job matrix, candidate IDs, job IDs
+    """
+    df = load_matches(matches_file, columns=['CandidateID', 'JobID'] + FEATURES)
+    df['Score'] = scorer.score(df)
+    count('pairs_scored', len(df))
+    return from_long_format(df, value_column='Score')
+
+def create_preference_csv_files(top_n, matrix_file='predictions_matrix.npz', scorer=None,
+                                matches_file='all_matches.parquet', store=None):
     """
     Create simple preference CSV files for employers and candidates without headers
     Replace missing preferences with 0
     
     Parameters:
     top_n: Number of top preferences to consider for each candidate/job
+    matrix_file: Candidate x job prediction matrix written by job_matching.py
+    scorer: Optional Scorer; if given, pairs in matches_file are scored with it instead
+    store: Optional match store file (see match_store.py) that also gets the pair scores
     """
-    # Read the input file
-    df = pd.read_csv(r'C:\Users\kritv\Downloads\BTECH PROJECT\predictions_total_match_best.csv')
+    with stage('scoring'):
+        if scorer is None:
+            # Read the prediction matrix (rows are candidates, columns are jobs, both sorted by ID)
+            matrix, candidate_ids, job_ids = load_score_matrix(matrix_file)
+        else:
+            matrix, candidate_ids, job_ids = score_matrix_from_features(scorer, matches_file)
     
-    # Initialize lists for preferences
-    job_pref_rows = []
-    candidate_pref_rows = []
+    if store:
+        with stage('store_scores'):
+            # Pairs without a score (NaN cells) are left out of the store
+            pairs = to_long_format(matrix, candidate_ids, job_ids, value_column='Score')
+            store_scores(store, pairs['CandidateID'].to_numpy(), pairs['JobID'].to_numpy(), pairs['Score'].to_numpy())
     
-    # Create job preferences
-    for job in sorted(df['JobID'].unique()):
-        job_data = df[df['JobID'] == job]
-        sorted_candidates = job_data.sort_values('Predicted', ascending=False)
-        top_candidates = sorted_candidates['CandidateID'].head(top_n).tolist()
+    with stage('top_n'):
+        # Create job preferences: top candidates down each column
+        # (positions past the number of candidates come back as 0)
+        job_pref_rows = positions_to_ids(top_n_preferences(matrix, top_n, axis=0), candidate_ids)
         
-        # Fill with 0 if fewer candidates than top_n
-        while len(top_candidates) < top_n:
-            top_candidates.append(0)
-        
-        # Create row for CSV (just the preferences)
-        job_pref_rows.append(top_candidates)
-    
-    # Create candidate preferences
-    for candidate in sorted(df['CandidateID'].unique()):
-        candidate_data = df[df['CandidateID'] == candidate]
-        sorted_jobs = candidate_data.sort_values('Predicted', ascending=False)
-        top_jobs = sorted_jobs['JobID'].head(top_n).tolist()
-        
-        # Fill with 0 if fewer jobs than top_n
-        while len(top_jobs) < top_n:
-            top_jobs.append(0)
-        
-        # Create row for CSV (just the preferences)
-        candidate_pref_rows.append(top_jobs)
+        # Create candidate preferences: top jobs along each row
+        candidate_pref_rows = positions_to_ids(top_n_preferences(matrix, top_n, axis=1), job_ids)
+        count('preferences', int((job_pref_rows > 0).sum() + (candidate_pref_rows > 0).sum()))
     
     # Convert to DataFrames
     job_pref_df = pd.DataFrame(job_pref_rows)
     candidate_pref_df = pd.DataFrame(candidate_pref_rows)
     
     # Save to CSV files without headers
-    job_pref_df.to_csv('job_preferences.csv', index=False, header=False)
-    candidate_pref_df.to_csv('candidate_preferences.csv', index=False, header=False)
+    with stage('write_preferences'):
+        job_pref_df.to_csv('job_preferences.csv', index=False, header=False)
+        candidate_pref_df.to_csv('candidate_preferences.csv', index=False, header=False)
     
     print("\nPreference files created:")
     print("1. job_preferences.csv")
     print("2. candidate_preferences.csv")
 
+def main():
+    parser = argparse.ArgumentParser(description="Generate candidate and job preference lists")
+    parser.add_argument('--top-n', type=positive_int, default=10, help="preferences kept per candidate/job")
+    parser.add_argument('--scorer', choices=['predictions', 'weighted', 'model'], default='predictions',
+                        help="predictions: job_matching.py's matrix, weighted: exact score formula, "
+                             "model: compiled xgboost model")
+    parser.add_argument('--weights', type=json.loads, default=None,
+                        help='weights for the weighted scorer, e.g. \'{"Skill_Match": 0.6}\'')
+    parser.add_argument('--store', metavar='FILE',
+                        help="also save the pair scores to this match store (see match_store.py), e.g. match_store.db")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.setup(args)
+    
+    scorer = None if args.scorer == 'predictions' else make_scorer(args.scorer, args.weights)
+    create_preference_csv_files(top_n=args.top_n, scorer=scorer, store=args.store)
+    instrumentation.finish(args)
+
 if __name__ == "__main__":
-    create_preference_csv_files(top_n=10)
+    main()
@@ -2,6 +2,7 @@ import os
 import google.generativeai as genai
 import yaml
 from pypdf import PdfReader
+import metrics
 
 
 # Load API key from the configuration file
@@ -28,7 +29,8 @@ def ats_extractor(resume_path):
         str: Parsed resume data as JSON string.
     """
     # Upload the resume to Gemini's File API
-    uploaded_file = genai.upload_file(resume_path)
+    with metrics.phase("llm_upload"):
+        uploaded_file = genai.upload_file(resume_path)
 
     # Choose a Gemini model and create a prompt
     model = genai.GenerativeModel("gemini-1.5-pro")
@@ -49,8 +51,9 @@ def ats_extractor(resume_path):
         """
 
     # Process the uploaded file and get the response
-    response = model.generate_content([prompt, uploaded_file])
-    print(response.text)
+    with metrics.phase("generation"):
+        response = model.generate_content([prompt, uploaded_file])
+        print(response.text)
 
     # Return the JSON result
     return response.text
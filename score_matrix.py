@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+
+# Matrix cells handled per partition call, bounds the temporary memory for large markets
+BLOCK_CELLS = 1 << 24
+
+
+def from_long_format(df, value_column='Predicted', fill_value=np.nan):
+    """
+    Lay a long (CandidateID, JobID, value) table out as a dense float32 candidate x job matrix.
+
+    Returns: matrix, sorted candidate IDs (row labels), sorted job IDs (column labels)
+    """
+    candidate_ids, rows = np.unique(df['CandidateID'].to_numpy(), return_inverse=True)
+    job_ids, cols = np.unique(df['JobID'].to_numpy(), return_inverse=True)
+
+    matrix = np.full((len(candidate_ids), len(job_ids)), fill_value, dtype=np.float32)
+    matrix[rows, cols] = df[value_column].to_numpy(dtype=np.float32)
+    return matrix, candidate_ids, job_ids
+
+
+def to_long_format(matrix, candidate_ids, job_ids, value_column='Predicted'):
+    """Expand a dense or sparse score matrix back to one row per (CandidateID, JobID) pair"""
+    if hasattr(matrix, 'tocoo'):
+        coo = matrix.tocoo()
+        rows, cols, values = coo.row, coo.col, coo.data
+    else:
+        rows, cols = np.indices(matrix.shape).reshape(2, -1)
+        values = matrix.ravel()
+
+    return pd.DataFrame({
+        'CandidateID': candidate_ids[rows],
+        'JobID': job_ids[cols],
+        value_column: values,
+    })
+
+
+def save_score_matrix(path, matrix, candidate_ids, job_ids):
+    """Save a dense or CSR score matrix and its ID labels to one .npz file"""
+    if hasattr(matrix, 'tocsr'):
+        csr = matrix.tocsr()
+        np.savez(path, data=csr.data, indices=csr.indices, indptr=csr.indptr,
+                 shape=np.array(csr.shape), candidate_ids=candidate_ids, job_ids=job_ids)
+    else:
+        np.savez(path, matrix=matrix, candidate_ids=candidate_ids, job_ids=job_ids)
+
+
+def load_score_matrix(path):
+    """Load a score matrix written by save_score_matrix"""
+    with np.load(path) as npz:
+        if 'matrix' in npz:
+            matrix = npz['matrix']
+        else:
+            from scipy.sparse import csr_matrix
+            matrix = csr_matrix((npz['data'], npz['indices'], npz['indptr']), shape=tuple(npz['shape']))
+        return matrix, npz['candidate_ids'], npz['job_ids']
+
+
+def _top_n_dense(matrix, top_n):
+    """
+    Column positions of the top_n largest values of every row, best first.
+    Non-finite cells (NaN for pairs without a score) are never preferences.
+    """
+    n_rows, n_cols = matrix.shape
+    k = min(top_n, n_cols)
+    result = np.full((n_rows, top_n), -1, dtype=np.int64)
+    block_rows = max(1, BLOCK_CELLS // max(n_cols, 1))
+    dtype = np.result_type(matrix.dtype, np.float32)
+
+    for start in range(0, n_rows, block_rows):
+        block = -np.asarray(matrix[start:start + block_rows], dtype=dtype)
+        # Rank missing cells last, below every real score
+        block[~np.isfinite(block)] = np.inf
+        if k < n_cols:
+            # Keep everything better than the k-th score, then the first ties by position,
+            # so ties are broken by ID instead of by whatever argpartition returns
+            kth = np.partition(block, k - 1, axis=1)[:, k - 1:k]
+            better = block < kth
+            ties = block == kth
+            ties &= np.cumsum(ties, axis=1) <= k - better.sum(axis=1, keepdims=True)
+            part = np.nonzero(better | ties)[1].reshape(len(block), k)
+        else:
+            part = np.broadcast_to(np.arange(n_cols), block.shape)
+        values = np.take_along_axis(block, part, axis=1)
+        order = np.argsort(values, axis=1, kind='stable')
+        positions = np.take_along_axis(part, order, axis=1)
+        # Missing cells sort last, so dropping them leaves the real preferences in front
+        result[start:start + len(block), :k] = np.where(np.take_along_axis(values, order, axis=1) == np.inf,
+                                                        -1, positions)
+
+    return result
+
+
+def _top_n_sparse(matrix, top_n):
+    """
+    Same as _top_n_dense, only looking at the stored entries of a CSR matrix (short rows).
+    The stored entries of a block of rows are laid out left-aligned in a dense block,
+    padded with NaN, and ranked with the dense partition.
+    """
+    n_rows = matrix.shape[0]
+    result = np.full((n_rows, top_n), -1, dtype=np.int64)
+    if matrix.nnz == 0:
+        return result
+    if not matrix.has_sorted_indices:
+        # Ties are broken by position, which has to be column order like in the dense path
+        matrix = matrix.sorted_indices()
+    indptr, indices, data = matrix.indptr, matrix.indices, matrix.data
+    lengths = np.diff(indptr)
+    width = int(lengths.max())
+    block_rows = max(1, BLOCK_CELLS // width)
+
+    for start in range(0, n_rows, block_rows):
+        stop = min(start + block_rows, n_rows)
+        block_lengths = lengths[start:stop]
+        rows = np.repeat(np.arange(stop - start), block_lengths)
+        offsets = np.arange(indptr[start], indptr[stop]) - np.repeat(indptr[start:stop], block_lengths)
+
+        values = np.full((stop - start, width), np.nan, dtype=np.result_type(data.dtype, np.float32))
+        values[rows, offsets] = data[indptr[start]:indptr[stop]]
+        columns = np.zeros((stop - start, width), dtype=np.int64)
+        columns[rows, offsets] = indices[indptr[start]:indptr[stop]]
+
+        positions = _top_n_dense(values, top_n)
+        result[start:stop] = np.where(positions >= 0,
+                                      np.take_along_axis(columns, np.maximum(positions, 0), axis=1), -1)
+
+    return result
+
+
+def top_n_preferences(matrix, top_n, axis=1):
+    """
+    Positions of the top_n highest scores per candidate (axis=1, positions are job columns)
+    or per job (axis=0, positions are candidate rows). Missing entries are -1.
+    """
+    if top_n < 1:
+        raise ValueError(f"top_n must be at least 1, got {top_n}")
+    if hasattr(matrix, 'tocsr'):
+        csr = matrix.tocsr() if axis == 1 else matrix.T.tocsr()
+        return _top_n_sparse(csr, top_n)
+    return _top_n_dense(matrix if axis == 1 else matrix.T, top_n)
+
+
+def positions_to_ids(positions, ids):
+    """Map top-N positions to IDs, using 0 for missing preferences like the CSV files expect"""
+    return np.where(positions >= 0, ids[np.maximum(positions, 0)], 0)
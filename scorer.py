@@ -0,0 +1,70 @@
+from abc import ABC, abstractmethod
+import numpy as np
+
+# Match features produced by combined_dataset.py, each on a 0-100 scale
+FEATURES = ['Skill_Match', 'Experience_Match', 'Degree_Match',
+            'Salary_Match', 'Remote_Match', 'Location_Match']
+
+# Weights of the Total_Match_Score formula
+DEFAULT_WEIGHTS = {
+    'Skill_Match': 0.70,       # 70% weight for skills
+    'Experience_Match': 0.05,  # 5% weight for experience
+    'Degree_Match': 0.10,      # 10% weight for degree
+    'Salary_Match': 0.10,      # 10% weight for salary
+    'Remote_Match': 0.025,     # 2.5% weight for remote preference
+    'Location_Match': 0.025,   # 2.5% weight for location
+}
+
+
+class Scorer(ABC):
+    """Turns match features (a DataFrame or dict of columns) into one score per pair"""
+
+    @abstractmethod
+    def score(self, features):
+        """Scores of the pairs, an array as long as the feature columns"""
+
+
+class WeightedSumScorer(Scorer):
+    """
+    Exact Total_Match_Score: a weighted sum of the features, no model involved. Summed in
+    float64 in the same order as combined_dataset.py, so the same features give the same score.
+    """
+
+    def __init__(self, weights=None):
+        unknown = set(weights or {}) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown features in weights: {sorted(unknown)}")
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+
+    def score(self, features):
+        total = None
+        for name, weight in self.weights.items():
+            column = np.asarray(features[name], dtype=np.float64) * weight
+            total = column if total is None else total + column
+        return total
+
+
+class ModelScorer(Scorer):
+    """Scores from the tuned xgboost model, evaluated from its exported node arrays"""
+
+    def __init__(self, compiled_file='xgb_compiled.npz'):
+        from tree_evaluator import load_compiled, leaf_tables
+        self.compiled = load_compiled(compiled_file)
+        if len(self.compiled['feature_names']) == 0:
+            raise ValueError(f"{compiled_file} has no feature names, re-export it with job_matching.py")
+        self.tables = leaf_tables(self.compiled)
+
+    def score(self, features):
+        from tree_evaluator import predict
+        # Columns in the order the model was trained on
+        columns = [features[name] for name in self.compiled['feature_names']]
+        return predict(self.compiled, np.column_stack(columns), self.tables)
+
+
+def make_scorer(name, weights=None, compiled_file='xgb_compiled.npz'):
+    """Build a scorer by name: 'weighted' (exact formula) or 'model' (learned weights)"""
+    if name == 'weighted':
+        return WeightedSumScorer(weights)
+    if name == 'model':
+        return ModelScorer(compiled_file)
+    raise ValueError(f"Unknown scorer '{name}', expected 'weighted' or 'model'")
@@ -0,0 +1,158 @@
+import argparse
+import itertools
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from data_generator import positive_int
+from displacement import calculate_displacement
+from MMDAA import multi_match_daa_by_submarket
+from score_matrix import from_long_format, load_score_matrix, top_n_preferences, positions_to_ids
+from scorer import FEATURES, WeightedSumScorer
+from storage import load_matches
+
+# Score matrices shared read-only with the worker processes (memory-mapped .npy files)
+_shared = {}
+
+
+def prepare_shared_data(workdir, matches_file='all_matches.parquet', predictions_file=None):
+    """
+    Lay the match features out as a (feature, candidate, job) float32 array once and save it
+    (and optionally job_matching.py's prediction matrix) as .npy files the workers can map,
+    with the candidate and job IDs labelling their rows and columns. Pairs missing from the
+    match table stay NaN, so they are left out of the preference lists like in
+    preference_generator.py.
+
+    Returns: dict of file paths for init_worker
+    """
+    df = load_matches(matches_file, columns=['CandidateID', 'JobID'] + FEATURES)
+    matrices = [from_long_format(df, value_column=feature) for feature in FEATURES]
+    arrays = {'features': np.stack([matrix for matrix, _, _ in matrices]),
+              'features_candidate_ids': matrices[0][1], 'features_job_ids': matrices[0][2]}
+
+    if predictions_file is not None:
+        predictions, candidate_ids, job_ids = load_score_matrix(predictions_file)
+        arrays.update({'predictions': np.asarray(predictions, dtype=np.float32),
+                       'predictions_candidate_ids': candidate_ids, 'predictions_job_ids': job_ids})
+
+    paths = {}
+    for name, array in arrays.items():
+        paths[name] = os.path.join(workdir, f'{name}.npy')
+        np.save(paths[name], array)
+    return paths
+
+
+def init_worker(paths):
+    """Map the shared arrays once per worker process"""
+    for name, path in paths.items():
+        _shared[name] = np.load(path, mmap_mode='r')
+
+
+def scenario_scores(weights):
+    """
+    Candidate x job scores of a scenario, the prediction matrix or a weighted feature sum,
+    as float32 like preference_generator.py ranks them.
+
+    Returns: scores, candidate IDs, job IDs
+    """
+    source = 'predictions' if weights is None else 'features'
+    if weights is None:
+        scores = _shared['predictions']
+    else:
+        features = _shared['features']
+        scores = WeightedSumScorer(weights).score({name: features[i] for i, name in enumerate(FEATURES)})
+        scores = scores.astype(np.float32)
+    return scores, _shared[f'{source}_candidate_ids'], _shared[f'{source}_job_ids']
+
+
+def run_scenario(scenario):
+    """Preference generation, MMDAA and displacement analysis for one parameter combination"""
+    start = time.perf_counter()
+    scores, candidate_ids, job_ids = scenario_scores(scenario['weights'])
+
+    # Same rows as the preference CSV files: IDs, padded with 0
+    candidate_rows = positions_to_ids(top_n_preferences(scores, scenario['top_n'], axis=1), job_ids)
+    job_rows = positions_to_ids(top_n_preferences(scores, scenario['top_n'], axis=0), candidate_ids)
+    candidate_prefs = [[int(x) for x in row] for row in candidate_rows]
+    job_prefs = [[int(x) for x in row] for row in job_rows]
+
+    all_matches = multi_match_daa_by_submarket([[x for x in row if x > 0] for row in candidate_prefs],
+                                               [[x for x in row if x > 0] for row in job_prefs],
+                                               scenario['k'], workers=1)
+
+    candidate_displacements = []
+    job_displacements = []
+    for matches in all_matches:
+        candidate_displacements.append(np.mean(calculate_displacement(candidate_prefs, matches)))
+        job_displacements.append(np.mean(calculate_displacement(job_prefs, [(j, c) for c, j in matches])))
+
+    return {
+        'top_n': scenario['top_n'],
+        'k': scenario['k'],
+        'scores': scenario['label'],
+        'rounds': len(all_matches),
+        'total_matches': sum(len(matches) for matches in all_matches),
+        'round1_matches': len(all_matches[0]) if all_matches else 0,
+        'candidate_displacement_round1': candidate_displacements[0] if all_matches else np.nan,
+        'candidate_displacement_mean': np.mean(candidate_displacements) if all_matches else np.nan,
+        'job_displacement_round1': job_displacements[0] if all_matches else np.nan,
+        'job_displacement_mean': np.mean(job_displacements) if all_matches else np.nan,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def build_scenarios(top_n_values, k_values, weight_specs):
+    """Cartesian product of the parameter grid. A weight spec of None means the prediction matrix"""
+    scenarios = []
+    for top_n, k, (label, weights) in itertools.product(top_n_values, k_values, weight_specs):
+        scenarios.append({'top_n': top_n, 'k': k, 'label': label, 'weights': weights})
+    return scenarios
+
+
+def run_simulation(scenarios, paths, workers=None):
+    """Run all scenarios in a process pool sharing the mapped score arrays, returns a DataFrame"""
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(paths,)) as executor:
+        rows = list(executor.map(run_scenario, scenarios))
+    return pd.DataFrame(rows)
+
+
+def parse_weight_spec(spec):
+    """'predictions', 'default' or a JSON object of feature weights"""
+    if spec == 'predictions':
+        return spec, None
+    if spec == 'default':
+        return spec, {}
+    return spec, json.loads(spec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run preference generation, MMDAA and displacement over a parameter grid")
+    parser.add_argument('--top-n', type=positive_int, nargs='+', default=[10], help="preference list lengths")
+    parser.add_argument('--k', type=positive_int, nargs='+', default=[10], help="MMDAA rounds")
+    parser.add_argument('--weights', nargs='+', default=['default'],
+                        help="'predictions' (job_matching.py's matrix), 'default' or JSON weights, "
+                             "e.g. '{\"Skill_Match\": 0.5}'")
+    parser.add_argument('--matches', default='all_matches.parquet')
+    parser.add_argument('--predictions', default='predictions_matrix.npz')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default='simulation_results.csv')
+    args = parser.parse_args()
+
+    weight_specs = [parse_weight_spec(spec) for spec in args.weights]
+    needs_predictions = any(weights is None for _, weights in weight_specs)
+    scenarios = build_scenarios(args.top_n, args.k, weight_specs)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = prepare_shared_data(workdir, args.matches, args.predictions if needs_predictions else None)
+        results = run_simulation(scenarios, paths, args.workers)
+
+    results.to_csv(args.output, index=False)
+    print(results.to_string(index=False))
+    print(f"\n{len(results)} scenarios written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from scipy import sparse
+
+# Output cells computed per block (per thread), bounds the dense temporaries
+BLOCK_CELLS = 1 << 22
+
+
+def split_skills(skills):
+    """Skill tokens of a "Python, SQL" string, exactly as combined_dataset.calculate_skill_match splits them"""
+    return [skill.strip() for skill in skills.split(',')]
+
+
+class SkillMatcher:
+    """
+    Skill_Match of many candidates against a fixed set of jobs, as sparse matrix products.
+
+    calculate_skill_match counts a job skill as covered if any candidate skill is a substring
+    of it or contains it, and scores the covered share of the job's skills. Here:
+
+        C  candidates x candidate tokens (one-hot)
+        R  candidate tokens x job tokens, R[a, b] = 1 if a in b or b in a
+        J  jobs x job tokens (token counts, duplicates count like in the pair loop)
+
+        covered = (C @ R) > 0
+        Skill_Match = covered @ J.T / skills per job * 100
+
+    which gives exactly the same numbers. Candidate tokens not seen before (e.g. from parsed
+    resumes) are added to the vocabulary on the fly, their relation row is computed once.
+    """
+
+    def __init__(self, job_skills):
+        job_tokens = [split_skills(skills) for skills in job_skills]
+        self.job_vocabulary = {}
+        for tokens in job_tokens:
+            for token in tokens:
+                self.job_vocabulary.setdefault(token, len(self.job_vocabulary))
+        self._job_token_list = list(self.job_vocabulary)
+
+        job_matrix = _one_hot(job_tokens, self.job_vocabulary, binary=False)
+        # Job tokens x jobs, the right-hand side of every product
+        self.job_matrix_t = job_matrix.T.tocsr()
+        self.job_lengths = np.array([len(tokens) for tokens in job_tokens], dtype=np.float64)
+
+        # Candidate tokens seen so far and, per token, the job tokens it covers
+        self.candidate_vocabulary = {}
+        self._relation_rows = []
+
+    def _add_candidate_token(self, token):
+        self.candidate_vocabulary[token] = len(self.candidate_vocabulary)
+        self._relation_rows.append([idx for idx, job_token in enumerate(self._job_token_list)
+                                    if token in job_token or job_token in token])
+
+    def relation_matrix(self):
+        """R: candidate tokens x job tokens, 1 where one token is a substring of the other"""
+        rows = np.repeat(np.arange(len(self._relation_rows)), [len(row) for row in self._relation_rows])
+        cols = np.fromiter((idx for row in self._relation_rows for idx in row), dtype=np.int64, count=len(rows))
+        return sparse.csr_matrix((np.ones(len(rows)), (rows, cols)),
+                                 shape=(len(self._relation_rows), len(self.job_vocabulary)))
+
+    def encode(self, candidate_skills):
+        """C: candidates x candidate tokens, growing the vocabulary with unseen tokens"""
+        candidate_tokens = [split_skills(skills) for skills in candidate_skills]
+        for tokens in candidate_tokens:
+            for token in tokens:
+                if token not in self.candidate_vocabulary:
+                    self._add_candidate_token(token)
+        return _one_hot(candidate_tokens, self.candidate_vocabulary, binary=True)
+
+    def score(self, candidate_skills, workers=None, dtype=np.float32):
+        """
+        Skill_Match of every candidate with every job.
+
+        Parameters:
+        candidate_skills: sequence of skill strings, one per candidate
+        workers: threads computing the row blocks of the product (default: all cores)
+
+        Returns: candidates x jobs array
+        """
+        candidates = self.encode(candidate_skills)
+        relation = self.relation_matrix()
+        n_candidates, n_jobs = candidates.shape[0], self.job_matrix_t.shape[1]
+        scores = np.empty((n_candidates, n_jobs), dtype=dtype)
+        rows = max(1, BLOCK_CELLS // max(n_jobs, 1))
+
+        def score_block(start):
+            covered = candidates[start:start + rows] @ relation
+            covered.data[:] = 1
+            matched = (covered @ self.job_matrix_t).toarray()
+            # Same operations as calculate_skill_match: (matches / len(job_skills_list)) * 100
+            scores[start:start + rows] = (matched / self.job_lengths) * 100
+
+        # The sparse products release the GIL, so the blocks run in parallel on threads
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+            list(executor.map(score_block, range(0, n_candidates, rows)))
+
+        return scores
+
+
+def _one_hot(token_lists, vocabulary, binary):
+    """Rows of token lists as a CSR matrix over the vocabulary (counts, or 0/1 if binary)"""
+    lengths = np.fromiter(map(len, token_lists), dtype=np.int64, count=len(token_lists))
+    rows = np.repeat(np.arange(len(token_lists)), lengths)
+    cols = np.fromiter((vocabulary[token] for tokens in token_lists for token in tokens),
+                       dtype=np.int64, count=int(lengths.sum()))
+    # Duplicate entries are summed by the constructor
+    matrix = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(token_lists), len(vocabulary)))
+    if binary:
+        matrix.data[:] = 1
+    return matrix
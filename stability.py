@@ -0,0 +1,163 @@
+import argparse
+import sys
+from itertools import chain
+import numpy as np
+import pandas as pd
+
+
+def _flatten(prefs, index_base):
+    """
+    Flatten preference lists into (owner, listed agent, position) arrays, with the listed
+    agents converted to 0-based positions
+    """
+    lengths = np.fromiter(map(len, prefs), dtype=np.int64, count=len(prefs))
+    total = int(lengths.sum())
+    owners = np.repeat(np.arange(len(prefs), dtype=np.int64), lengths)
+    listed = np.fromiter(chain.from_iterable(prefs), dtype=np.int64, count=total) - index_base
+    positions = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return owners, listed, positions, lengths
+
+
+def _first_occurrences(owners, listed, n_listed):
+    """
+    Positions of the entries that refer to known agents, keeping only the first entry of an
+    agent listed twice (the matchers also only use the first, e.g. MMDAA.run_daa's setdefault)
+    """
+    known = np.flatnonzero((listed >= 0) & (listed < n_listed))
+    _, first = np.unique(owners[known] * n_listed + listed[known], return_index=True)
+    return known[np.sort(first)]
+
+
+class _Market:
+    """Preference lists as flat arrays plus a hash index of the employers' ranks"""
+
+    def __init__(self, candidates_prefs, employers_prefs, index_base):
+        self.n_candidates = len(candidates_prefs)
+        self.n_employers = len(employers_prefs)
+
+        cand, emp, pos, self.candidate_lengths = _flatten(candidates_prefs, index_base)
+        # Entries pointing at unknown employers can never be matched, drop them
+        valid = _first_occurrences(cand, emp, self.n_employers)
+        self.cand, self.emp, self.pos = cand[valid], emp[valid], pos[valid]
+
+        owner, listed, rank, _ = _flatten(employers_prefs, index_base)
+        valid = _first_occurrences(owner, listed, self.n_candidates)
+        self.employer_keys = pd.Index(owner[valid] * self.n_candidates + listed[valid])
+        self.employer_ranks = rank[valid]
+        self.employer_alive = np.ones(len(self.employer_ranks), dtype=bool)
+        self.candidate_alive = np.ones(len(self.cand), dtype=bool)
+
+    def employer_rank(self, employers, candidates):
+        """Rank of each candidate on each employer's (residual) list, inf if not listed"""
+        if not len(self.employer_ranks):
+            # No employer lists anyone, there is nothing to index
+            return np.full(len(employers), np.inf)
+        found = self.employer_keys.get_indexer(employers * self.n_candidates + candidates)
+        listed = found >= 0
+        listed[listed] = self.employer_alive[found[listed]]
+        return np.where(listed, self.employer_ranks[found], np.inf)
+
+    def remove_pairs(self, candidates, employers):
+        """Drop matched pairs from both sides' residual lists (MMDAA's later rounds)"""
+        removed = pd.Index(candidates * self.n_employers + employers)
+        self.candidate_alive &= ~pd.Index(self.cand * self.n_employers + self.emp).isin(removed)
+        found = self.employer_keys.get_indexer(employers * self.n_candidates + candidates)
+        self.employer_alive[found[found >= 0]] = False
+
+    def blocking_pairs(self, candidate_matches, mutual):
+        """All (candidate, employer) pairs, 0-based, that block the given matching"""
+        holder = np.full(self.n_employers, -1, dtype=np.int64)
+        matched = np.flatnonzero(candidate_matches >= 0)
+        holder[candidate_matches[matched]] = matched
+
+        # Position of each candidate's partner on its list (its full length when unmatched)
+        match_pos = self.candidate_lengths.astype(np.int64).copy()
+        is_partner = self.emp == candidate_matches[self.cand]
+        match_pos[self.cand[is_partner]] = self.pos[is_partner]
+
+        # Employers the candidate likes better than its partner
+        better = self.candidate_alive & (self.pos < match_pos[self.cand])
+        cand, emp = self.cand[better], self.emp[better]
+
+        rank = self.employer_rank(emp, cand)
+        holders = holder[emp]
+        holder_rank = np.where(holders >= 0, self.employer_rank(emp, np.maximum(holders, 0)), np.inf)
+        blocks = (holders == -1) | (rank < holder_rank)
+        if mutual:
+            blocks &= rank != np.inf
+
+        return np.column_stack([cand[blocks], emp[blocks]])
+
+
+def find_blocking_pairs(candidates_prefs, employers_prefs, candidate_matches, mutual=False, index_base=0):
+    """
+    Find every blocking pair of a one-to-one matching in O(total preference length):
+    a candidate and employer that both prefer each other to their current partners.
+
+    Parameters:
+    candidates_prefs, employers_prefs: preference lists
+    candidate_matches: employer of every candidate, below index_base if unmatched
+                       (DAA.deferred_acceptance uses -1)
+    mutual: if True, an employer only accepts candidates it lists (MMDAA.run_daa); if False
+            an unmatched employer accepts anyone (DAA.deferred_acceptance)
+    index_base: 0 for DAA.py's 0-based IDs, 1 for MMDAA.py's 1-based IDs
+
+    Returns: array of (candidate, employer) pairs using the same IDs as the input
+    """
+    market = _Market(candidates_prefs, employers_prefs, index_base)
+    matches = np.asarray(candidate_matches, dtype=np.int64)
+    matches = np.where(matches >= index_base, matches - index_base, -1)
+    return market.blocking_pairs(matches, mutual) + index_base
+
+
+def find_blocking_pairs_per_round(candidates_prefs, employers_prefs, all_matches, index_base=1):
+    """
+    Check every round of MMDAA.multi_match_daa output against the preferences left after
+    the earlier rounds (mutual acceptance, like run_daa).
+
+    Returns: list with the blocking pairs (same IDs as the input) of every round
+    """
+    market = _Market(candidates_prefs, employers_prefs, index_base)
+    results = []
+
+    for matches in all_matches:
+        pairs = np.asarray(matches, dtype=np.int64).reshape(-1, 2) - index_base
+        candidate_matches = np.full(market.n_candidates, -1, dtype=np.int64)
+        candidate_matches[pairs[:, 0]] = pairs[:, 1]
+
+        results.append(market.blocking_pairs(candidate_matches, mutual=True) + index_base)
+        market.remove_pairs(pairs[:, 0], pairs[:, 1])
+
+    return results
+
+
+def report(blocking_pairs, label="Matching"):
+    """Print a short summary, returns True if the matching is stable"""
+    if len(blocking_pairs) == 0:
+        print(f"{label}: stable")
+        return True
+    print(f"{label}: {len(blocking_pairs)} blocking pairs, e.g. (candidate, employer) "
+          f"{[tuple(map(int, pair)) for pair in blocking_pairs[:5]]}")
+    return False
+
+
+def main():
+    from DAA import load_preferences
+
+    parser = argparse.ArgumentParser(description="Check a DAA.py matching for blocking pairs")
+    parser.add_argument("--candidates", default="candidate_preferences.csv")
+    parser.add_argument("--employers", default="job_preferences.csv")
+    parser.add_argument("--matching", default="matching_results.csv", help="output of DAA.py")
+    args = parser.parse_args()
+
+    candidates_prefs, employers_prefs = load_preferences(args.candidates, args.employers)
+    results = pd.read_csv(args.matching, comment='#')
+    # matching_results.csv is 1-based with 0 for unmatched
+    candidate_matches = results['matched_employer'].to_numpy() - 1
+
+    stable = report(find_blocking_pairs(candidates_prefs, employers_prefs, candidate_matches))
+    sys.exit(0 if stable else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+# Low-cardinality text columns stored as categoricals (dictionary encoded in Parquet)
+CANDIDATE_CATEGORIES = ['Job Type', 'Location', 'Degree', 'Remote']
+JOB_CATEGORIES = ['Title', 'Location', 'Degree Requirement', 'Remote Allowed']
+
+CANDIDATE_DTYPES = {
+    'CandidateID': np.int32,
+    'Experience (Years)': np.uint8,
+    'Expected Salary': np.float32,
+}
+JOB_DTYPES = {
+    'JobID': np.int32,
+    'Min Experience (Years)': np.uint8,
+    'Salary Offered (In INR)': np.float32,
+}
+
+# Match features that can only be 0 or 100 fit in a uint8, the rest are float32
+MATCH_DTYPES = {
+    'CandidateID': np.int32,
+    'JobID': np.int32,
+    'Skill_Match': np.float32,
+    'Experience_Match': np.float32,
+    'Degree_Match': np.uint8,
+    'Salary_Match': np.float32,
+    'Location_Match': np.uint8,
+    'Remote_Match': np.uint8,
+    'Total_Match_Score': np.float32,
+    'Is_Match': bool,
+    'Actual': np.float32,
+    'Predicted': np.float32,
+}
+
+SALARY_COLUMNS = ['Expected Salary', 'Salary Offered (In INR)']
+
+
+def parse_salary(salary):
+    """Parse a salary column like "5,00,000" into numbers in one vectorized pass"""
+    if pd.api.types.is_numeric_dtype(salary):
+        return salary
+    return pd.to_numeric(salary.astype(str).str.replace(',', '', regex=False))
+
+
+def _apply_types(df, dtypes, categories=()):
+    """Cast the columns present in df to their storage types"""
+    for column in SALARY_COLUMNS:
+        if column in df.columns:
+            df[column] = parse_salary(df[column])
+    for column, dtype in dtypes.items():
+        if column in df.columns:
+            df[column] = df[column].astype(dtype)
+    for column in categories:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    return df
+
+
+def normalize_candidates(df):
+    """Give a candidate DataFrame its storage types: numeric salary, categoricals, compact ints"""
+    return _apply_types(df, CANDIDATE_DTYPES, CANDIDATE_CATEGORIES)
+
+
+def normalize_jobs(df):
+    """Give a job DataFrame its storage types: numeric salary, categoricals, compact ints"""
+    return _apply_types(df, JOB_DTYPES, JOB_CATEGORIES)
+
+
+def normalize_matches(df):
+    """Give a match/prediction DataFrame compact score dtypes"""
+    return _apply_types(df, MATCH_DTYPES)
+
+
+def read_table(path, columns=None):
+    """Read only the requested columns from a Parquet or CSV file"""
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+def write_table(df, path):
+    """Write a DataFrame as Parquet or CSV, picked from the file extension"""
+    if path.endswith('.parquet'):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def load_candidates(path, columns=None):
+    return normalize_candidates(read_table(path, columns))
+
+
+def load_jobs(path, columns=None):
+    return normalize_jobs(read_table(path, columns))
+
+
+def load_matches(path, columns=None):
+    return normalize_matches(read_table(path, columns))
+
+
+def write_matches(df, path):
+    write_table(normalize_matches(df), path)
+
+
+def ingest(input_file, output_file, normalize):
+    """Convert a raw CSV into a typed Parquet file, parsing salaries once"""
+    df = normalize(read_table(input_file))
+    write_table(df, output_file)
+    print(f"{input_file} ({os.path.getsize(input_file)} bytes) -> "
+          f"{output_file} ({os.path.getsize(output_file)} bytes)")
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert raw candidate/job CSVs to typed Parquet")
+    parser.add_argument("--candidates", default="candidate_mock_data.csv")
+    parser.add_argument("--jobs", default="job_mock_data.csv")
+    args = parser.parse_args()
+
+    ingest(args.candidates, os.path.splitext(args.candidates)[0] + '.parquet', normalize_candidates)
+    ingest(args.jobs, os.path.splitext(args.jobs)[0] + '.parquet', normalize_jobs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Aim for a few batches per worker so one large submarket does not leave the others idle
+BATCHES_PER_WORKER = 4
+
+
+def find_submarkets(candidates_prefs, employers_prefs, index_base=0):
+    """
+    Find the connected components of the bipartite acceptability graph with union-find.
+    A candidate and an employer are connected if either one lists the other.
+
+    Parameters:
+    candidates_prefs, employers_prefs: preference lists of employer/candidate IDs
+    index_base: 0 if IDs are positions (DAA.py), 1 if they are 1-based (MMDAA.py)
+
+    Returns: list of (candidate positions, employer positions) per component, both sorted
+    """
+    n_candidates = len(candidates_prefs)
+    n_employers = len(employers_prefs)
+    # Candidates are nodes 0..n_candidates-1, employers follow them
+    parent = list(range(n_candidates + n_employers))
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]  # path halving
+            node = parent[node]
+        return node
+
+    def union(a, b):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_b] = root_a
+
+    for candidate, prefs in enumerate(candidates_prefs):
+        for employer in prefs:
+            employer -= index_base
+            if 0 <= employer < n_employers:
+                union(candidate, n_candidates + employer)
+
+    for employer, prefs in enumerate(employers_prefs):
+        for candidate in prefs:
+            candidate -= index_base
+            if 0 <= candidate < n_candidates:
+                union(n_candidates + employer, candidate)
+
+    components = {}
+    for node in range(n_candidates + n_employers):
+        candidates, employers = components.setdefault(find(node), ([], []))
+        if node < n_candidates:
+            candidates.append(node)
+        else:
+            employers.append(node - n_candidates)
+
+    return list(components.values())
+
+
+def split_market(candidates_prefs, employers_prefs, index_base=0):
+    """
+    Split a market into independent submarkets with their own, renumbered preference lists.
+    References to unknown agents are dropped (they can only ever be rejected).
+
+    Returns: list of (candidate positions, employer positions, candidates prefs, employers prefs)
+    """
+    submarkets = []
+
+    for candidates, employers in find_submarkets(candidates_prefs, employers_prefs, index_base):
+        candidate_local = {candidate: i for i, candidate in enumerate(candidates)}
+        employer_local = {employer: i for i, employer in enumerate(employers)}
+
+        local_candidates_prefs = [
+            [employer_local[e - index_base] + index_base for e in candidates_prefs[c] if e - index_base in employer_local]
+            for c in candidates
+        ]
+        local_employers_prefs = [
+            [candidate_local[c - index_base] + index_base for c in employers_prefs[e] if c - index_base in candidate_local]
+            for e in employers
+        ]
+        submarkets.append((candidates, employers, local_candidates_prefs, local_employers_prefs))
+
+    return submarkets
+
+
+def _solve_batch(solve, batch):
+    """Run the matching algorithm on every submarket of a batch (runs in a worker process)"""
+    return [solve(candidates_prefs, employers_prefs) for candidates_prefs, employers_prefs in batch]
+
+
+def iter_solved(solve, submarkets, workers=None):
+    """
+    Run solve(candidates_prefs, employers_prefs) on every submarket, in one process pool when
+    there is more than one worker. solve must be picklable (a module level function or a
+    functools.partial of one).
+
+    Yields: lists of (submarket index, result), one per finished batch of submarkets
+    """
+    workers = workers or os.cpu_count() or 1
+    problems = [(candidates_prefs, employers_prefs) for _, _, candidates_prefs, employers_prefs in submarkets]
+    if not problems:
+        return
+
+    # Greedily balance the submarkets over the batches by size, largest first
+    n_batches = min(len(problems), workers * BATCHES_PER_WORKER)
+    batches = [[] for _ in range(n_batches)]
+    batch_sizes = [0] * n_batches
+    sizes = [len(candidates_prefs) + sum(map(len, candidates_prefs)) for candidates_prefs, _ in problems]
+    for i in sorted(range(len(problems)), key=lambda i: -sizes[i]):
+        target = batch_sizes.index(min(batch_sizes))
+        batches[target].append(i)
+        batch_sizes[target] += sizes[i]
+
+    if workers == 1 or len(problems) <= 1:
+        for batch in batches:
+            yield list(zip(batch, _solve_batch(solve, [problems[i] for i in batch])))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_solve_batch, solve, [problems[i] for i in batch]): batch for batch in batches}
+        for future in as_completed(futures):
+            yield list(zip(futures[future], future.result()))
+
+
+def solve_submarkets(solve, submarkets, workers=None):
+    """
+    Run solve(candidates_prefs, employers_prefs) on every submarket, see iter_solved.
+
+    Returns: results in the same order as submarkets
+    """
+    results = [None] * len(submarkets)
+    for solved in iter_solved(solve, submarkets, workers):
+        for i, result in solved:
+            results[i] = result
+    return results
@@ -0,0 +1,222 @@
+import random
+import pytest
+from DAA import deferred_acceptance
+from MMDAA import run_daa, multi_match_daa
+from dynamic_matching import DynamicMatching, DynamicMultiMatching
+from stability import find_blocking_pairs, find_blocking_pairs_per_round
+
+SEED = 0
+MARKETS = 500
+
+
+def random_market(rng, max_candidates=15, max_employers=10, max_length=5):
+    """Random 0-based preference lists, some of them empty"""
+    n, m = rng.randint(1, max_candidates), rng.randint(1, max_employers)
+    candidates_prefs = [rng.sample(range(m), min(m, rng.randint(0, max_length))) for _ in range(n)]
+    employers_prefs = [rng.sample(range(n), min(n, rng.randint(0, max_length))) for _ in range(m)]
+    return candidates_prefs, employers_prefs
+
+
+def one_based(prefs):
+    return [[x + 1 for x in p] for p in prefs]
+
+
+def mutual_deferred_acceptance(candidates_prefs, employers_prefs):
+    """MMDAA.run_daa on 0-based lists, in the candidate_matches format of DAA.py"""
+    matches = [-1] * len(candidates_prefs)
+    for candidate, employer in run_daa(one_based(candidates_prefs), one_based(employers_prefs)):
+        matches[candidate - 1] = employer - 1
+    return matches
+
+
+def same_rounds(all_matches, expected):
+    """Rounds hold the same pairs (multi_match_daa lists them in acceptance order)"""
+    return [sorted(matches) for matches in all_matches] == [sorted(matches) for matches in expected]
+
+
+def random_matching(rng, candidates_prefs):
+    """Arbitrary (mostly unstable) one-to-one matching of candidates to employers on their lists"""
+    taken = set()
+    matches = []
+    for prefs in candidates_prefs:
+        free = [e for e in prefs if e not in taken]
+        employer = rng.choice(free) if free and rng.random() < 0.7 else -1
+        taken.add(employer)
+        matches.append(employer)
+    return matches
+
+
+def brute_force_blocking_pairs(candidates_prefs, employers_prefs, candidate_matches, mutual):
+    holder = {e: c for c, e in enumerate(candidate_matches) if e != -1}
+    pairs = set()
+    for candidate, prefs in enumerate(candidates_prefs):
+        match = candidate_matches[candidate]
+        for employer in prefs[:prefs.index(match) if match != -1 else len(prefs)]:
+            ranks = employers_prefs[employer]
+            if mutual and candidate not in ranks:
+                continue
+            current = holder.get(employer, -1)
+            rank = ranks.index(candidate) if candidate in ranks else float('inf')
+            if current == -1 or rank < (ranks.index(current) if current in ranks else float('inf')):
+                pairs.add((candidate, employer))
+    return pairs
+
+
+def apply_random_changes(rng, dm, candidates_prefs, employers_prefs):
+    """Apply 1-4 random changes to both the DynamicMatching and the plain lists, repairing after each"""
+    for _ in range(rng.randint(1, 4)):
+        op = rng.random()
+        n, m = len(candidates_prefs), len(employers_prefs)
+        if op < 0.25:
+            prefs = rng.sample(range(m), min(m, rng.randint(0, 5)))
+            candidates_prefs.append(prefs)
+            dm.add_candidate(prefs)
+        elif op < 0.4:
+            prefs = rng.sample(range(n), min(n, rng.randint(0, 5)))
+            employers_prefs.append(prefs)
+            dm.add_employer(prefs)
+        elif op < 0.6:
+            candidate = rng.randrange(n)
+            candidates_prefs[candidate] = rng.sample(range(m), min(m, rng.randint(0, 5)))
+            dm.set_candidate_prefs(candidate, candidates_prefs[candidate])
+        elif op < 0.8:
+            employer = rng.randrange(m)
+            employers_prefs[employer] = rng.sample(range(n), min(n, rng.randint(0, 5)))
+            dm.set_employer_prefs(employer, employers_prefs[employer])
+        elif op < 0.9:
+            candidate = rng.randrange(n)
+            candidates_prefs[candidate] = []
+            dm.remove_candidate(candidate)
+        else:
+            employer = rng.randrange(m)
+            employers_prefs[employer] = []
+            dm.remove_employer(employer)
+        dm.repair()
+
+
+@pytest.mark.parametrize("mutual", [False, True])
+def test_cold_start_matches_deferred_acceptance(mutual):
+    rng = random.Random(SEED)
+    for _ in range(MARKETS):
+        candidates_prefs, employers_prefs = random_market(rng)
+        expected = (mutual_deferred_acceptance(candidates_prefs, employers_prefs) if mutual
+                    else deferred_acceptance(candidates_prefs, employers_prefs)[0])
+        assert DynamicMatching(candidates_prefs, employers_prefs, mutual=mutual).candidate_matches == expected
+
+
+@pytest.mark.parametrize("mutual", [False, True])
+def test_repair_keeps_matching_stable(mutual):
+    rng = random.Random(SEED)
+    for _ in range(MARKETS):
+        candidates_prefs, employers_prefs = random_market(rng)
+        matches = (mutual_deferred_acceptance(candidates_prefs, employers_prefs) if mutual
+                   else deferred_acceptance(candidates_prefs, employers_prefs)[0])
+        dm = DynamicMatching(candidates_prefs, employers_prefs, matches, mutual=mutual)
+        apply_random_changes(rng, dm, candidates_prefs, employers_prefs)
+
+        # A removed employer rejects everyone, which DAA.py expresses by nobody listing it
+        candidates_prefs = [[e for e in prefs if e not in dm.removed_employers] for prefs in candidates_prefs]
+        assert len(find_blocking_pairs(candidates_prefs, employers_prefs, dm.candidate_matches, mutual=mutual)) == 0
+
+
+def test_repair_after_displaced_warm_start_holder():
+    # Candidate 0 holds employer 1 in the previous matching, is displaced by candidate 3 and
+    # must get employer 1 back once candidate 3 leaves
+    dm = DynamicMatching([[1, 0], [0], [0], []], [[3], [2, 3, 0]], [1, -1, -1, -1], mutual=True)
+    dm.set_candidate_prefs(3, [1, 0])
+    dm.repair()
+    assert dm.candidate_matches == [-1, -1, -1, 1]
+    dm.remove_candidate(3)
+    dm.repair()
+    assert dm.candidate_matches == [1, -1, -1, -1]
+
+
+def test_multi_matching_cold_start_matches_multi_match_daa():
+    rng = random.Random(SEED)
+    for _ in range(MARKETS):
+        candidates_prefs, employers_prefs = map(one_based, random_market(rng))
+        k = rng.randint(1, 4)
+        dm = DynamicMultiMatching(candidates_prefs, employers_prefs, k)
+        assert same_rounds(dm.all_matches, multi_match_daa(candidates_prefs, employers_prefs, k))
+
+
+def test_multi_matching_repair_keeps_rounds_stable():
+    rng = random.Random(SEED)
+    for _ in range(MARKETS):
+        candidates_prefs, employers_prefs = map(one_based, random_market(rng))
+        k = rng.randint(1, 4)
+        dm = DynamicMultiMatching(candidates_prefs, employers_prefs, k,
+                                  multi_match_daa(candidates_prefs, employers_prefs, k))
+        for _ in range(rng.randint(1, 3)):
+            if rng.random() < 0.5:
+                candidate = rng.randint(1, len(candidates_prefs))
+                prefs = rng.sample(range(1, len(employers_prefs) + 1), min(len(employers_prefs), rng.randint(0, 5)))
+                candidates_prefs[candidate - 1] = prefs
+                dm.set_candidate_prefs(candidate, prefs)
+            else:
+                employer = rng.randint(1, len(employers_prefs))
+                prefs = rng.sample(range(1, len(candidates_prefs) + 1), min(len(candidates_prefs), rng.randint(0, 5)))
+                employers_prefs[employer - 1] = prefs
+                dm.set_employer_prefs(employer, prefs)
+
+        rounds = find_blocking_pairs_per_round(candidates_prefs, employers_prefs, dm.all_matches)
+        assert all(len(pairs) == 0 for pairs in rounds)
+
+
+def test_multi_matching_warm_start_with_fewer_rounds():
+    rng = random.Random(SEED)
+    for _ in range(MARKETS):
+        candidates_prefs, employers_prefs = map(one_based, random_market(rng))
+        # Rounds computed with a smaller k are completed, not taken as exhausted
+        previous = multi_match_daa(candidates_prefs, employers_prefs, 1)
+        dm = DynamicMultiMatching(candidates_prefs, employers_prefs, 3, previous)
+        assert same_rounds(dm.all_matches, multi_match_daa(candidates_prefs, employers_prefs, 3))
+
+
+def test_multi_matching_rejects_more_rounds_than_k():
+    candidates_prefs, employers_prefs = [[1, 2], [1, 2]], [[1, 2], [1, 2]]
+    all_matches = multi_match_daa(candidates_prefs, employers_prefs, 2)
+    assert len(all_matches) == 2
+    with pytest.raises(ValueError):
+        DynamicMultiMatching(candidates_prefs, employers_prefs, 1, all_matches)
+
+
+@pytest.mark.parametrize("mutual", [False, True])
+def test_find_blocking_pairs_matches_brute_force(mutual):
+    rng = random.Random(SEED)
+    for _ in range(MARKETS):
+        candidates_prefs, employers_prefs = random_market(rng)
+        matches = random_matching(rng, candidates_prefs)
+        found = find_blocking_pairs(candidates_prefs, employers_prefs, matches, mutual=mutual)
+        expected = brute_force_blocking_pairs(candidates_prefs, employers_prefs, matches, mutual)
+        assert set(map(tuple, found.tolist())) == expected
+
+
+def test_find_blocking_pairs_without_employer_lists():
+    assert find_blocking_pairs([[0]], [[]], [-1]).tolist() == [[0, 0]]
+    assert len(find_blocking_pairs([[0]], [[]], [-1], mutual=True)) == 0
+
+
+def with_repeats(rng, prefs):
+    """Preference lists with some entries listed a second time further down"""
+    return [p + rng.sample(p, rng.randint(0, len(p))) for p in prefs]
+
+
+@pytest.mark.parametrize("mutual", [False, True])
+def test_find_blocking_pairs_with_repeated_entries(mutual):
+    rng = random.Random(SEED)
+    for _ in range(MARKETS):
+        candidates_prefs, employers_prefs = map(lambda prefs: with_repeats(rng, prefs), random_market(rng))
+        matches = random_matching(rng, candidates_prefs)
+        found = find_blocking_pairs(candidates_prefs, employers_prefs, matches, mutual=mutual).tolist()
+        # Only the first entry counts, and every blocking pair is reported once
+        assert len(found) == len(set(map(tuple, found)))
+        assert set(map(tuple, found)) == brute_force_blocking_pairs(candidates_prefs, employers_prefs, matches, mutual)
+
+
+def test_run_daa_with_repeated_entries_is_stable():
+    rng = random.Random(SEED)
+    for _ in range(MARKETS):
+        candidates_prefs, employers_prefs = map(lambda prefs: with_repeats(rng, prefs), random_market(rng))
+        matches = mutual_deferred_acceptance(candidates_prefs, employers_prefs)
+        assert len(find_blocking_pairs(candidates_prefs, employers_prefs, matches, mutual=True)) == 0
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from scipy import sparse
+import score_matrix
+from score_matrix import from_long_format, to_long_format, top_n_preferences
+
+SEED = 0
+
+
+def random_scores(rng, n_rows, n_cols, missing=0.3):
+    """Scores on a coarse grid (lots of ties) with NaN for pairs without a score, some rows all NaN"""
+    matrix = rng.integers(0, 5, size=(n_rows, n_cols)).astype(np.float32)
+    matrix[rng.random(matrix.shape) < missing] = np.nan
+    matrix[rng.random(n_rows) < 0.1] = np.nan
+    return matrix
+
+
+def to_sparse(matrix):
+    """CSR matrix storing exactly the scored cells, zeros included"""
+    rows, cols = np.nonzero(~np.isnan(matrix))
+    return sparse.csr_matrix((matrix[rows, cols], (rows, cols)), shape=matrix.shape)
+
+
+def brute_force_top_n(matrix, top_n):
+    """Highest scores first, ties by lower position, padded with -1"""
+    result = np.full((len(matrix), top_n), -1, dtype=np.int64)
+    for i, row in enumerate(matrix):
+        ranked = sorted(np.flatnonzero(~np.isnan(row)), key=lambda j: (-row[j], j))[:top_n]
+        result[i, :len(ranked)] = ranked
+    return result
+
+
+@pytest.mark.parametrize("top_n", [1, 3, 8, 20])
+@pytest.mark.parametrize("axis", [0, 1])
+def test_top_n_preferences_matches_brute_force(top_n, axis, monkeypatch):
+    # Small blocks, so rows are ranked across several partition calls
+    monkeypatch.setattr(score_matrix, 'BLOCK_CELLS', 64)
+    rng = np.random.default_rng(SEED)
+    matrix = random_scores(rng, 50, 12)
+    expected = brute_force_top_n(matrix if axis == 1 else matrix.T, top_n)
+    np.testing.assert_array_equal(top_n_preferences(matrix, top_n, axis=axis), expected)
+    np.testing.assert_array_equal(top_n_preferences(to_sparse(matrix), top_n, axis=axis), expected)
+
+
+def test_top_n_preferences_breaks_ties_by_position():
+    matrix = np.array([[1, 2, 2, 2, 0]], dtype=np.float32)
+    assert top_n_preferences(matrix, 2).tolist() == [[1, 2]]
+    assert top_n_preferences(to_sparse(matrix), 2).tolist() == [[1, 2]]
+
+
+def test_top_n_preferences_of_unscored_rows():
+    matrix = np.full((3, 4), np.nan, dtype=np.float32)
+    assert (top_n_preferences(matrix, 2) == -1).all()
+    assert (top_n_preferences(to_sparse(matrix), 2) == -1).all()
+
+
+def test_top_n_preferences_rejects_top_n_below_one():
+    with pytest.raises(ValueError):
+        top_n_preferences(np.zeros((2, 2), dtype=np.float32), 0)
+
+
+def test_long_format_round_trip():
+    rng = np.random.default_rng(SEED)
+    matrix = random_scores(rng, 20, 7, missing=0.0)
+    candidate_ids, job_ids = np.arange(100, 120), np.arange(7) * 3 + 1
+    restored, restored_candidates, restored_jobs = from_long_format(to_long_format(matrix, candidate_ids, job_ids))
+    np.testing.assert_array_equal(restored, matrix)
+    np.testing.assert_array_equal(restored_candidates, candidate_ids)
+    np.testing.assert_array_equal(restored_jobs, job_ids)
@@ -0,0 +1,39 @@
+import random
+import numpy as np
+import pandas as pd
+from combined_dataset import calculate_skill_match, match_block
+from data_generator import generate_candidates, generate_jobs
+from skill_matrix import SkillMatcher
+
+SEED = 0
+# Tokens that are substrings of each other, so both directions of the containment test matter
+TOKENS = ["SQL", "MySQL", "Python", "Python 3", "R", "React", "Java", "JavaScript", "Excel", "C++", ""]
+
+
+def random_skills(rng, n, max_tokens=5):
+    """Comma separated skill strings, with repeated tokens and irregular spacing"""
+    return [" ,".join(rng.choice(TOKENS) for _ in range(rng.randint(1, max_tokens))) for _ in range(n)]
+
+
+def test_score_matches_calculate_skill_match():
+    rng = random.Random(SEED)
+    candidate_skills, job_skills = random_skills(rng, 200), random_skills(rng, 60)
+    expected = np.array([[calculate_skill_match(c, j) for j in job_skills] for c in candidate_skills])
+    np.testing.assert_array_equal(SkillMatcher(job_skills).score(candidate_skills, dtype=np.float64), expected)
+
+
+def test_score_grows_the_vocabulary_across_calls():
+    rng = random.Random(SEED)
+    job_skills = random_skills(rng, 30)
+    matcher = SkillMatcher(job_skills)
+    for _ in range(3):
+        # Later batches bring tokens the matcher has not seen yet
+        candidate_skills = random_skills(rng, 50) + [f"Skill {rng.randrange(1000)}, SQL"]
+        expected = np.array([[calculate_skill_match(c, j) for j in job_skills] for c in candidate_skills])
+        np.testing.assert_array_equal(matcher.score(candidate_skills, workers=2, dtype=np.float64), expected)
+
+
+def test_match_block_with_skill_matcher_matches_pair_loop():
+    candidate_df, job_df = generate_candidates(40, seed=SEED), generate_jobs(25, seed=SEED + 1)
+    pd.testing.assert_frame_equal(match_block(candidate_df, job_df, SkillMatcher(job_df['Required Skills'])),
+                                  match_block(candidate_df, job_df))
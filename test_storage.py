@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+from storage import (CANDIDATE_CATEGORIES, CANDIDATE_DTYPES, JOB_DTYPES, load_candidates, load_jobs,
+                     load_matches, normalize_candidates, normalize_jobs, write_matches, write_table)
+
+SEED = 0
+
+
+def raw_candidates(rng, n):
+    """Candidates as the original CSV files had them, salaries written like "5,00,000" """
+    salaries = rng.integers(3, 15, size=n) * 100000
+    return pd.DataFrame({
+        'CandidateID': np.arange(1, n + 1),
+        'Job Type': rng.choice(['Data Scientist', 'Accountant'], size=n),
+        'Skills': rng.choice(['Python, SQL', 'Excel, SAP, Auditing', 'R'], size=n),
+        'Experience (Years)': rng.integers(0, 21, size=n),
+        'Location': rng.choice(['Mumbai', 'Noida', 'Chennai'], size=n),
+        'Degree': rng.choice(["Bachelor's", 'PhD'], size=n),
+        'Expected Salary': [f"{s // 100000},{s % 100000 // 1000:02d},{s % 1000:03d}" for s in salaries],
+        'Remote': rng.choice(['Yes', 'No'], size=n),
+    })
+
+
+def raw_jobs(rng, n):
+    return pd.DataFrame({
+        'JobID': np.arange(1, n + 1),
+        'Title': rng.choice(['Data Scientist', 'Accountant'], size=n),
+        'Required Skills': rng.choice(['Python, SQL', 'Excel, SAP'], size=n),
+        'Min Experience (Years)': rng.integers(0, 16, size=n),
+        'Location': rng.choice(['Mumbai', 'Noida'], size=n),
+        'Degree Requirement': rng.choice(['High School', "Master's"], size=n),
+        'Salary Offered (In INR)': [f"{s:,}" for s in rng.integers(3, 15, size=n) * 100000],
+        'Remote Allowed': rng.choice(['Yes', 'No'], size=n),
+    })
+
+
+def assert_storage_types(df, dtypes, categories):
+    for column, dtype in dtypes.items():
+        assert df[column].dtype == dtype, column
+    for column in categories:
+        assert isinstance(df[column].dtype, pd.CategoricalDtype), column
+
+
+def test_parse_salary_strings():
+    df = normalize_candidates(raw_candidates(np.random.default_rng(SEED), 1).assign(**{'Expected Salary': ['5,00,000']}))
+    assert df['Expected Salary'].tolist() == [500000.0]
+
+
+@pytest.mark.parametrize("extension", ['.parquet', '.csv'])
+def test_candidates_round_trip(tmp_path, extension):
+    raw = raw_candidates(np.random.default_rng(SEED), 50)
+    df = normalize_candidates(raw.copy())
+    path = str(tmp_path / f'candidates{extension}')
+    write_table(df, path)
+    loaded = load_candidates(path)
+
+    assert_storage_types(loaded, CANDIDATE_DTYPES, CANDIDATE_CATEGORIES)
+    expected_salaries = raw['Expected Salary'].str.replace(',', '').astype(np.float32)
+    np.testing.assert_array_equal(loaded['Expected Salary'].to_numpy(), expected_salaries.to_numpy())
+    # CSV does not keep the category order, compare values only
+    pd.testing.assert_frame_equal(loaded, df, check_categorical=extension == '.parquet')
+
+
+@pytest.mark.parametrize("extension", ['.parquet', '.csv'])
+def test_jobs_round_trip(tmp_path, extension):
+    df = normalize_jobs(raw_jobs(np.random.default_rng(SEED), 50))
+    path = str(tmp_path / f'jobs{extension}')
+    write_table(df, path)
+    columns = ['JobID', 'Location', 'Salary Offered (In INR)']
+    loaded = load_jobs(path, columns=columns)
+
+    assert list(loaded.columns) == columns
+    assert_storage_types(loaded, {column: JOB_DTYPES[column] for column in columns if column in JOB_DTYPES},
+                         ['Location'])
+    pd.testing.assert_frame_equal(loaded, df[columns], check_categorical=extension == '.parquet')
+
+
+@pytest.mark.parametrize("extension", ['.parquet', '.csv'])
+def test_matches_round_trip(tmp_path, extension):
+    rng = np.random.default_rng(SEED)
+    df = pd.DataFrame({
+        'CandidateID': np.repeat(np.arange(1, 11), 5),
+        'JobID': np.tile(np.arange(1, 6), 10),
+        'Skill_Match': rng.uniform(0, 100, 50),
+        'Degree_Match': rng.choice([0, 100], 50),
+        'Is_Match': rng.random(50) < 0.5,
+    })
+    path = str(tmp_path / f'matches{extension}')
+    write_matches(df, path)
+    loaded = load_matches(path)
+
+    assert loaded.dtypes.to_dict() == {'CandidateID': np.int32, 'JobID': np.int32, 'Skill_Match': np.float32,
+                                       'Degree_Match': np.uint8, 'Is_Match': bool}
+    np.testing.assert_array_equal(loaded['Skill_Match'], df['Skill_Match'].astype(np.float32))
+    np.testing.assert_array_equal(loaded['Degree_Match'], df['Degree_Match'])
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+from tree_evaluator import export_booster, leaf_tables, predict, _traverse
+
+SEED = 0
+N_FEATURES = 4
+
+
+def random_ensemble(rng, n_trees, max_depth, split_probability=0.8):
+    """Node arrays in export_booster's layout for random trees (thresholds on a coarse grid, so rows hit them exactly)"""
+    left, right, feature, threshold, default_left, value, roots = [], [], [], [], [], [], []
+    depth_reached = 0
+
+    for _ in range(n_trees):
+        roots.append(len(left))
+        pending = [(len(left), 0)]
+        left.append(0), right.append(0), feature.append(0), threshold.append(0.0)
+        default_left.append(False), value.append(0.0)
+        while pending:
+            node, depth = pending.pop()
+            depth_reached = max(depth_reached, depth)
+            if depth < max_depth and (depth == 0 or rng.random() < split_probability):
+                children = []
+                for _ in range(2):
+                    children.append(len(left))
+                    pending.append((len(left), depth + 1))
+                    left.append(0), right.append(0), feature.append(0), threshold.append(0.0)
+                    default_left.append(False), value.append(0.0)
+                left[node], right[node] = children
+                feature[node] = int(rng.integers(N_FEATURES))
+                threshold[node] = float(rng.integers(0, 10))
+                default_left[node] = bool(rng.random() < 0.5)
+            else:
+                # Leaves point back to themselves
+                left[node] = right[node] = node
+                value[node] = float(rng.normal())
+
+    return {
+        'left': np.asarray(left, dtype=np.int32),
+        'right': np.asarray(right, dtype=np.int32),
+        'feature': np.asarray(feature, dtype=np.int32),
+        'threshold': np.asarray(threshold, dtype=np.float32),
+        'default_left': np.asarray(default_left, dtype=bool),
+        'value': np.asarray(value, dtype=np.float32),
+        'roots': np.asarray(roots, dtype=np.int32),
+        'max_depth': np.int32(depth_reached),
+        'base_score': np.float32(0.5),
+        'feature_names': np.asarray([], dtype=str),
+    }
+
+
+def random_rows(rng, n_rows, missing=0.1):
+    X = rng.integers(0, 10, size=(n_rows, N_FEATURES)).astype(np.float32)
+    X[rng.random(X.shape) < missing] = np.nan
+    return X
+
+
+@pytest.mark.parametrize("n_trees,max_depth", [(1, 1), (10, 3), (150, 6), (5, 0)])
+def test_predict_matches_traversal(n_trees, max_depth):
+    rng = np.random.default_rng(SEED)
+    compiled = random_ensemble(rng, n_trees, max_depth)
+    X = random_rows(rng, 3000)
+    assert leaf_tables(compiled) is not None
+    np.testing.assert_array_equal(predict(compiled, X), _traverse(compiled, X))
+
+
+def test_trees_over_64_leaves_fall_back_to_traversal():
+    rng = np.random.default_rng(SEED)
+    # A full depth-7 tree has 128 leaves
+    compiled = random_ensemble(rng, 3, 7, split_probability=1.0)
+    X = random_rows(rng, 1000)
+    assert leaf_tables(compiled) is None
+    np.testing.assert_array_equal(predict(compiled, X), _traverse(compiled, X))
+
+
+def test_predict_without_rows():
+    compiled = random_ensemble(np.random.default_rng(SEED), 3, 3)
+    assert predict(compiled, np.empty((0, N_FEATURES), dtype=np.float32)).shape == (0,)
+
+
+@pytest.mark.parametrize("max_depth", [3, 8])
+def test_predict_matches_xgboost(max_depth):
+    xgb = pytest.importorskip("xgboost")
+    rng = np.random.default_rng(SEED)
+    X = rng.uniform(0, 100, size=(2000, N_FEATURES)).astype(np.float32)
+    X[rng.random(X.shape) < 0.1] = np.nan
+    y = np.nan_to_num(X[:, 0]) + 0.5 * np.nan_to_num(X[:, 1]) + rng.normal(0, 1, len(X))
+    booster = xgb.train({'max_depth': max_depth, 'objective': 'reg:squarederror', 'seed': SEED, 'nthread': 1},
+                        xgb.DMatrix(X, label=y), num_boost_round=30)
+
+    compiled = export_booster(booster)
+    assert (leaf_tables(compiled) is None) == (max_depth > 6)
+    np.testing.assert_allclose(predict(compiled, X), booster.predict(xgb.DMatrix(X)), atol=1e-3)
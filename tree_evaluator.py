@@ -0,0 +1,315 @@
+import argparse
+import json
+import time
+import numpy as np
+
+# Objectives whose prediction is base_score + sum of leaves (no link function)
+IDENTITY_OBJECTIVES = {'reg:squarederror', 'reg:absoluteerror', 'reg:pseudohubererror'}
+
+# (rows x trees) leaf masks or node indexes tracked per step, small enough to stay in cache
+BLOCK_CELLS = 1 << 16
+# Trees sharing one set of lookup tables in predict()
+TREE_GROUP = 64
+# Leaves of a tree that fit in its uint64 mask, larger trees are evaluated node by node
+MAX_LEAVES = 64
+ALL_LEAVES = np.iinfo(np.uint64).max
+
+
+def _parse_base_score(value):
+    """base_score is stored as '0.5' or, in newer xgboost versions, '[5E-1]'"""
+    return float(str(value).strip('[]'))
+
+
+def export_booster(booster, path=None):
+    """
+    Flatten a trained xgboost Booster into NumPy node arrays.
+
+    All trees are concatenated: node i splits on feature[i] at threshold[i] and goes to
+    left[i] when the value is below it, right[i] otherwise, and left/right by
+    default_left[i] when the value is missing. Leaves point back to themselves and hold
+    their output in value[i], so every tree is resolved after max_depth steps.
+
+    Returns the arrays as a dict, and also saves them to path (.npz) if given.
+    """
+    model = json.loads(booster.save_raw(raw_format='json'))
+    learner = model['learner']
+
+    objective = learner['objective']['name']
+    if objective not in IDENTITY_OBJECTIVES:
+        raise ValueError(f"Unsupported objective '{objective}', only regression without a link function can be compiled")
+
+    trees = learner['gradient_booster']['model']['trees']
+    left, right, feature, threshold, default_left, value, roots = [], [], [], [], [], [], []
+    max_depth = 0
+    offset = 0
+
+    for tree in trees:
+        if any(tree['split_type']):
+            raise ValueError("Categorical splits are not supported")
+
+        tree_left = np.asarray(tree['left_children'], dtype=np.int32)
+        tree_right = np.asarray(tree['right_children'], dtype=np.int32)
+        n_nodes = len(tree_left)
+        nodes = np.arange(n_nodes, dtype=np.int32)
+        is_leaf = tree_left == -1
+
+        left.append(np.where(is_leaf, nodes, tree_left) + offset)
+        right.append(np.where(is_leaf, nodes, tree_right) + offset)
+        feature.append(np.where(is_leaf, 0, tree['split_indices']).astype(np.int32))
+        threshold.append(np.asarray(tree['split_conditions'], dtype=np.float32))
+        default_left.append(np.asarray(tree['default_left'], dtype=bool))
+        # For leaves split_conditions holds the leaf output
+        value.append(np.where(is_leaf, threshold[-1], 0).astype(np.float32))
+        roots.append(offset)
+
+        # Depth of every node from the parent links (parents always come before children)
+        depth = np.zeros(n_nodes, dtype=np.int32)
+        for node in range(1, n_nodes):
+            depth[node] = depth[tree['parents'][node]] + 1
+        max_depth = max(max_depth, int(depth.max()))
+        offset += n_nodes
+
+    compiled = {
+        'left': np.concatenate(left),
+        'right': np.concatenate(right),
+        'feature': np.concatenate(feature),
+        'threshold': np.concatenate(threshold),
+        'default_left': np.concatenate(default_left),
+        'value': np.concatenate(value),
+        'roots': np.asarray(roots, dtype=np.int32),
+        'max_depth': np.int32(max_depth),
+        'base_score': np.float32(_parse_base_score(learner['learner_model_param']['base_score'])),
+        'feature_names': np.asarray(booster.feature_names or [], dtype=str),
+    }
+
+    if path is not None:
+        np.savez(path, **compiled)
+    return compiled
+
+
+def load_compiled(path):
+    """Load node arrays written by export_booster"""
+    with np.load(path) as npz:
+        return {key: npz[key] for key in npz.files}
+
+
+def leaf_tables(compiled):
+    """
+    Lookup tables of the bitvector evaluator used by predict(), or None if a tree has more
+    than MAX_LEAVES leaves.
+
+    The leaves of every tree are numbered left to right, and a row's exit leaf is the lowest
+    leaf left after every split the row goes right at has cleared the leaves of its left
+    subtree. On one feature the splits a row goes right at are those with threshold <= x, a
+    prefix of the splits sorted by threshold, so the combined mask of every prefix is stored
+    as one table row (plus a row for missing values: the splits whose default is right).
+    Trees are grouped by TREE_GROUP, which bounds the tables to 8 bytes x the group's trees
+    x its splits.
+    """
+    left, right, feature = compiled['left'], compiled['right'], compiled['feature']
+    threshold, default_left, value = compiled['threshold'], compiled['default_left'], compiled['value']
+    roots = compiled['roots']
+    n_trees = len(roots)
+
+    # Leaves below every node as a bitmask, numbered left to right within each tree
+    below = np.zeros(len(left), dtype=np.uint64)
+    tree_of = np.zeros(len(left), dtype=np.int64)
+    leaf_values = np.zeros((n_trees, MAX_LEAVES), dtype=np.float32)
+    for tree, root in enumerate(roots):
+        stack, splits, n_leaves = [int(root)], [], 0
+        while stack:
+            node = stack.pop()
+            tree_of[node] = tree
+            if left[node] == node:
+                if n_leaves == MAX_LEAVES:
+                    return None
+                below[node] = np.uint64(1) << np.uint64(n_leaves)
+                leaf_values[tree, n_leaves] = value[node]
+                n_leaves += 1
+            else:
+                splits.append(node)
+                stack += [int(right[node]), int(left[node])]
+        for node in reversed(splits):
+            below[node] = below[left[node]] | below[right[node]]
+
+    splits = np.flatnonzero(left != np.arange(len(left)))
+    features = np.unique(feature[splits]).tolist()
+    # Every distinct threshold of a feature, one binary search per feature serves all groups
+    thresholds = [np.unique(threshold[splits[feature[splits] == f]]) for f in features]
+
+    groups = []
+    for start in range(0, n_trees, TREE_GROUP):
+        n_group = min(TREE_GROUP, n_trees - start)
+        in_group = splits[(tree_of[splits] >= start) & (tree_of[splits] < start + n_group)]
+        tables, positions, offset = [], [], 0
+
+        for f, feature_thresholds in zip(features, thresholds):
+            nodes = in_group[feature[in_group] == f]
+            nodes = nodes[np.argsort(threshold[nodes], kind='stable')]
+            columns = tree_of[nodes] - start
+            clear = ~below[left[nodes]]
+
+            # Row i: leaves left after going right at the first i splits, the last row is for missing values
+            table = np.full((len(nodes) + 2, n_group), ALL_LEAVES, dtype=np.uint64)
+            table[np.arange(1, len(nodes) + 1), columns] = clear
+            np.bitwise_and.accumulate(table[:-1], axis=0, out=table[:-1])
+            default_right = ~default_left[nodes]
+            np.bitwise_and.at(table[-1], columns[default_right], clear[default_right])
+
+            # Global search position (thresholds <= x, or the last one for missing) -> table row
+            local = np.searchsorted(threshold[nodes], feature_thresholds, side='right')
+            positions.append(np.concatenate([[0], local, [len(nodes) + 1]]).astype(np.intp) + offset)
+            tables.append(table)
+            offset += len(table)
+
+        groups.append({'start': start, 'trees': n_group, 'positions': positions,
+                       'masks': np.concatenate(tables) if tables else np.empty((0, n_group), dtype=np.uint64),
+                       'values': leaf_values[start:start + n_group].ravel(),
+                       # Flat index of leaf 0 of every tree, minus one for the +1 of the bit count below
+                       'value_offsets': np.arange(n_group, dtype=np.intp) * MAX_LEAVES - 1})
+
+    return {'features': features, 'thresholds': thresholds, 'groups': groups}
+
+
+def predict(compiled, X, tables=None):
+    """
+    Evaluate the flattened ensemble for every row of X (n_rows x n_features, or a DataFrame
+    with the training columns). Rows are processed in blocks and all trees advance together.
+
+    tables: leaf_tables(compiled), built here when not given (pass them when predicting
+            repeatedly with the same model)
+    """
+    if hasattr(X, 'columns') and len(compiled['feature_names']):
+        X = X[list(compiled['feature_names'])]
+    X = np.ascontiguousarray(X, dtype=np.float32)
+
+    if tables is None:
+        tables = leaf_tables(compiled)
+    if tables is None:
+        return _traverse(compiled, X)
+
+    n_rows, n_trees = len(X), len(compiled['roots'])
+    predictions = np.empty(n_rows, dtype=np.float32)
+    block_rows = max(1, BLOCK_CELLS // max(n_trees, 1))
+    one = np.uint64(1)
+
+    for start in range(0, n_rows, block_rows):
+        block = X[start:start + block_rows]
+        searched = []
+        for f, feature_thresholds in zip(tables['features'], tables['thresholds']):
+            x = block[:, f]
+            position = np.searchsorted(feature_thresholds, x, side='right')
+            position[np.isnan(x)] = len(feature_thresholds) + 1
+            searched.append(position)
+
+        leaves = np.empty((len(block), n_trees), dtype=np.float32)
+        for group in tables['groups']:
+            masks = np.full((len(block), group['trees']), ALL_LEAVES, dtype=np.uint64)
+            for position, rows in zip(searched, group['positions']):
+                np.bitwise_and(masks, group['masks'][rows[position]], out=masks)
+            # Bits up to and including the lowest set one: the exit leaf's number + 1
+            exit_leaf = np.bitwise_count(masks ^ (masks - one))
+            leaves[:, group['start']:group['start'] + group['trees']] = group['values'][group['value_offsets'] + exit_leaf]
+
+        predictions[start:start + len(block)] = leaves.sum(axis=1, dtype=np.float32)
+
+    return predictions + compiled['base_score']
+
+
+def _traverse(compiled, X):
+    """Node by node evaluation of every tree, max_depth steps (trees too large for leaf_tables)"""
+    # Children packed as [right, left] pairs, so the next node is children[2 * node + go_left]
+    children = np.stack([compiled['right'], compiled['left']], axis=1).ravel().astype(np.intp)
+    feature = compiled['feature'].astype(np.intp)
+    threshold, default_left = compiled['threshold'], compiled['default_left']
+    value = compiled['value']
+    roots = compiled['roots'].astype(np.intp)
+    max_depth = int(compiled['max_depth'])
+
+    n_rows, n_features = X.shape
+    predictions = np.empty(n_rows, dtype=np.float32)
+    block_rows = max(1, BLOCK_CELLS // max(len(roots), 1))
+
+    for start in range(0, n_rows, block_rows):
+        block = X[start:start + block_rows]
+        flat = block.ravel()
+        # Offset of every row inside the flattened block, so one gather reads x[row, feature]
+        row_offsets = (np.arange(len(block), dtype=np.intp) * n_features)[:, None]
+        has_missing = np.isnan(block).any()
+        nodes = np.broadcast_to(roots, (len(block), len(roots))).copy()
+
+        for _ in range(max_depth):
+            x = flat[row_offsets + feature[nodes]]
+            go_left = x < threshold[nodes]
+            if has_missing:
+                go_left |= np.isnan(x) & default_left[nodes]
+            nodes = children[2 * nodes + go_left]
+
+        predictions[start:start + len(block)] = value[nodes].sum(axis=1, dtype=np.float32)
+
+    return predictions + compiled['base_score']
+
+
+def benchmark(compiled, X, booster=None, repeats=3):
+    """
+    Time predict() against xgboost's native predict on the same rows. The lookup tables are
+    built once beforehand, like ModelScorer does, and timed separately.
+
+    Returns: dict with pairs/sec for both evaluators, the table build time and the largest
+             absolute difference
+    """
+    def best_time(fn):
+        best = float('inf')
+        result = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - start)
+        return best, result
+
+    tables_time, tables = best_time(lambda: leaf_tables(compiled))
+    compiled_time, compiled_pred = best_time(lambda: predict(compiled, X, tables))
+    results = {'pairs': len(X), 'compiled_pairs_per_sec': len(X) / compiled_time, 'tables_seconds': tables_time}
+
+    if booster is not None:
+        import xgboost as xgb
+        # A fresh DMatrix per call, xgboost caches predictions for a DMatrix it has seen
+        native_time, native_pred = best_time(lambda: booster.predict(xgb.DMatrix(X)))
+        results['native_pairs_per_sec'] = len(X) / native_time
+        results['max_abs_diff'] = float(np.max(np.abs(native_pred - compiled_pred))) if len(X) else 0.0
+
+    return results
+
+
+def main():
+    from storage import load_matches
+
+    parser = argparse.ArgumentParser(description="Benchmark the compiled tree evaluator against xgboost")
+    parser.add_argument('--compiled', default='xgb_compiled.npz', help="node arrays written by job_matching.py")
+    parser.add_argument('--model', default='xgb_best_model.json', help="xgboost model to compare against")
+    parser.add_argument('--data', default='all_matches.parquet', help="match table with the feature columns")
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    compiled = load_compiled(args.compiled)
+    X = load_matches(args.data, columns=list(compiled['feature_names']))
+
+    booster = None
+    try:
+        import xgboost as xgb
+        booster = xgb.Booster()
+        booster.load_model(args.model)
+    except ImportError:
+        print("xgboost is not installed, timing the compiled evaluator only")
+
+    results = benchmark(compiled, X, booster, args.repeats)
+    print(f"Pairs scored: {results['pairs']}")
+    print(f"Compiled evaluator: {results['compiled_pairs_per_sec']:,.0f} pairs/sec "
+          f"(lookup tables built in {results['tables_seconds']:.3f}s)")
+    if booster is not None:
+        print(f"xgboost predict:    {results['native_pairs_per_sec']:,.0f} pairs/sec")
+        print(f"Max abs difference: {results['max_abs_diff']:.6f}")
+
+
+if __name__ == "__main__":
+    main()